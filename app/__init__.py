@@ -1,6 +1,29 @@
+import decimal
+import orjson
 from flask import Flask, render_template
+from flask.json.provider import JSONProvider
 from app.config import config
 from app.api import api_bp
+from app.api._client import close_backboard_client
+
+
+def _orjson_default(obj):
+    """Encode the extra types Flask's default provider supports"""
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if hasattr(obj, "__html__"):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class ORJSONProvider(JSONProvider):
+    """JSON provider backed by orjson (output is compact and keys keep insertion order)"""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=_orjson_default).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 
 def create_app(config_name="default"):
@@ -9,10 +32,16 @@ def create_app(config_name="default"):
                 template_folder="templates",
                 static_folder="static")
     app.config.from_object(config[config_name])
+
+    # Use orjson for jsonify and request.get_json()
+    app.json = ORJSONProvider(app)
     
     # Register API blueprint
     app.register_blueprint(api_bp)
     
+    # Close the per-request Backboard client once the request (or its stream) ends
+    app.teardown_appcontext(close_backboard_client)
+    
     # Register routes
     @app.route("/")
     def index():
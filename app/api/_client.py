@@ -0,0 +1,62 @@
+import threading
+from flask import g
+from app.config import SETTINGS_FILE, Config, read_settings_file
+from app.services.backboard import BackboardClient
+
+# Parsed client settings, keyed by the settings file's mtime
+_client_cache = {"mtime": None, "settings": None}
+_client_cache_lock = threading.Lock()
+
+
+def _load_client_settings() -> tuple:
+    """Read (api_key, base_url, assistant_id) from the settings file"""
+    settings_data = read_settings_file()
+    if settings_data:
+        api_key = settings_data.get("api_key", "")
+        base_url = settings_data.get("base_url", "https://app.backboard.io/api")
+        assistant_id = settings_data.get("assistant_id")
+        return api_key, base_url, assistant_id
+
+    # Fallback to defaults
+    return Config.BACKBOARD_API_KEY, Config.BACKBOARD_BASE_URL, None
+
+
+def invalidate_client_cache():
+    """Force the next get_backboard_client call to re-read the settings file"""
+    with _client_cache_lock:
+        _client_cache["mtime"] = None
+        _client_cache["settings"] = None
+
+
+def create_backboard_client() -> BackboardClient:
+    """Build a Backboard client from settings (settings are re-read only when the file changes)
+
+    The caller owns the client and must close() it.
+    """
+    try:
+        mtime = SETTINGS_FILE.stat().st_mtime_ns
+    except OSError:
+        mtime = None
+
+    with _client_cache_lock:
+        if _client_cache["settings"] is None or _client_cache["mtime"] != mtime:
+            _client_cache["settings"] = _load_client_settings()
+            _client_cache["mtime"] = mtime
+        api_key, base_url, assistant_id = _client_cache["settings"]
+
+    return BackboardClient(api_key, base_url, assistant_id=assistant_id)
+
+
+def get_backboard_client() -> BackboardClient:
+    """Get the Backboard client for the current app context (closed on teardown)"""
+    if "backboard_client" not in g:
+        g.backboard_client = create_backboard_client()
+    return g.backboard_client
+
+
+def close_backboard_client(exception=None):
+    """Close the app context's Backboard client, if one was created"""
+    client = g.pop("backboard_client", None)
+    if client is not None:
+        client.close()
+
@@ -0,0 +1,17 @@
+import orjson
+from flask import Response, request
+
+
+def ojsonify(obj, status: int = 200) -> Response:
+    """Serialize obj with orjson and return it as a JSON response"""
+    return Response(orjson.dumps(obj), status=status, mimetype="application/json")
+
+
+def load_json():
+    """Parse the request body once with orjson (an empty body parses as {})"""
+    return orjson.loads(request.get_data(cache=True) or b"{}")
+
+
+def sse(payload: dict) -> bytes:
+    """Encode payload as a single Server-Sent Events data frame"""
+    return b"data: " + orjson.dumps(payload) + b"\n\n"
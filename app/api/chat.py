@@ -1,45 +1,65 @@
-import json
-from flask import request, jsonify
+import threading
+from concurrent.futures import Future
+from cachetools import TTLCache
+from flask import request, Response, stream_with_context
 from app.api import api_bp
-from app.services.backboard import BackboardClient
-from app.config import SETTINGS_FILE
+from app.api._client import get_backboard_client
+from app.api._json import load_json, ojsonify, sse
+from app.async_runtime import iter_async
 
-# Cache for threads by assistant_id
-_thread_cache = {}
+# Cache for threads by assistant_id (entries expire so external changes show up)
+_thread_cache = TTLCache(maxsize=64, ttl=60)
+_thread_cache_lock = threading.Lock()
+
+# Thread list fetches in progress, so concurrent refreshes share one upstream call
+_inflight_fetches = {}
 
 
 def invalidate_thread_cache(assistant_id: str = None):
     """Invalidate the thread cache for a specific assistant or all assistants"""
-    global _thread_cache
-    if assistant_id:
-        _thread_cache.pop(assistant_id, None)
-    else:
-        _thread_cache.clear()
+    with _thread_cache_lock:
+        if assistant_id:
+            _thread_cache.pop(assistant_id, None)
+        else:
+            _thread_cache.clear()
 
 
-def get_backboard_client() -> BackboardClient:
-    """Get Backboard client from settings"""
+def _fetch_threads(cache_key: str, assistant_id: str = None, search: str = None) -> list:
+    """Fetch threads, joining an identical fetch already in flight instead of repeating it"""
+    inflight_key = (cache_key, search)
+    with _thread_cache_lock:
+        future = _inflight_fetches.get(inflight_key)
+        is_leader = future is None
+        if is_leader:
+            future = Future()
+            _inflight_fetches[inflight_key] = future
+    
+    if not is_leader:
+        return future.result()
+    
     try:
-        if SETTINGS_FILE.exists():
-            with open(SETTINGS_FILE, "r") as f:
-                settings_data = json.load(f)
-                api_key = settings_data.get("api_key", "")
-                base_url = settings_data.get("base_url", "https://app.backboard.io/api")
-                assistant_id = settings_data.get("assistant_id")
-                return BackboardClient(api_key, base_url, assistant_id=assistant_id)
-    except:
-        pass
+        client = get_backboard_client()
+        threads = client.list_threads(assistant_id=assistant_id, search=search)
+    except Exception as e:
+        with _thread_cache_lock:
+            _inflight_fetches.pop(inflight_key, None)
+        future.set_exception(e)
+        raise
     
-    # Fallback to defaults
-    from app.config import Config
-    return BackboardClient(Config.BACKBOARD_API_KEY, Config.BACKBOARD_BASE_URL)
+    with _thread_cache_lock:
+        # Cache the result (only if no search filter, as search results shouldn't be cached)
+        if not search:
+            _thread_cache[cache_key] = threads
+        _inflight_fetches.pop(inflight_key, None)
+    future.set_result(threads)
+    return threads
 
 
 @api_bp.route("/chat", methods=["POST"])
 def chat():
     """Send a chat message to the LLM"""
     try:
-        data = request.get_json()
+        data = load_json()
         message = data.get("message", "")
         context_notes = data.get("context_notes", None)
         assistant_id = data.get("assistant_id", None)
@@ -47,7 +67,7 @@ def chat():
         categories = data.get("categories", None)  # Optional list of categories to filter memories
         
         if not message:
-            return jsonify({"error": "Message is required"}), 400
+            return ojsonify({"error": "Message is required"}, 400)
         
         client = get_backboard_client()
         result = client.chat(message, context_notes, assistant_id=assistant_id, thread_id=thread_id, categories=categories)
@@ -61,22 +81,59 @@ def chat():
         
         # Handle both old string return and new dict return for backward compatibility
         if isinstance(result, dict):
-            return jsonify(result), 200
+            return ojsonify(result, 200)
         else:
-            return jsonify({
+            return ojsonify({
                 "response": result,
                 "thread_id": None
-            }), 200
+            }, 200)
+        
+    except Exception as e:
+        return ojsonify({"error": str(e)}, 500)
+
+
+@api_bp.route("/chat/stream", methods=["POST"])
+def chat_stream():
+    """Send a chat message and stream the reply as Server-Sent Events"""
+    try:
+        data = load_json()
+        message = data.get("message", "")
+        assistant_id = data.get("assistant_id", None)
+        
+        if not message:
+            return ojsonify({"error": "Message is required"}, 400)
         
+        client = get_backboard_client()
+        thread_id, add_message_kwargs = client.prepare_chat(
+            message,
+            data.get("context_notes", None),
+            assistant_id=assistant_id,
+            thread_id=data.get("thread_id", None),
+            categories=data.get("categories", None),
+        )
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return ojsonify({"error": f"Chat request failed: {str(e)}"}, 500)
+    
+    def generate():
+        yield sse({'type': 'thread', 'thread_id': thread_id})
+        try:
+            # Forward reply text as it arrives instead of waiting for the whole message
+            for _, text in iter_async(client.chat_stream(add_message_kwargs)):
+                if text:
+                    yield sse({'type': 'content', 'content': text})
+            yield sse({'type': 'complete', 'thread_id': thread_id})
+        except Exception as e:
+            yield sse({'type': 'error', 'error': f"Chat request failed: {str(e)}"})
+        finally:
+            # The message landed in this assistant's thread list
+            invalidate_thread_cache(assistant_id)
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream')
 
 
 @api_bp.route("/threads", methods=["GET"])
 def list_threads():
     """List all threads for an assistant (cached)"""
-    global _thread_cache
-    
     try:
         assistant_id = request.args.get("assistant_id", None)
         search = request.args.get("search", None)
@@ -86,20 +143,17 @@ def list_threads():
         cache_key = assistant_id or "default"
         
         # Return cached result if available and no search filter and not forcing refresh
-        if cache_key in _thread_cache and not search and not force_refresh:
-            return jsonify(_thread_cache[cache_key]), 200
+        if not search and not force_refresh:
+            with _thread_cache_lock:
+                cached_threads = _thread_cache.get(cache_key)
+            if cached_threads is not None:
+                return ojsonify(cached_threads, 200)
         
         # Fetch from API
-        client = get_backboard_client()
-        threads = client.list_threads(assistant_id=assistant_id, search=search)
-        
-        # Cache the result (only if no search filter, as search results shouldn't be cached)
-        if not search:
-            _thread_cache[cache_key] = threads
-        
-        return jsonify(threads), 200
+        threads = _fetch_threads(cache_key, assistant_id=assistant_id, search=search)
+        return ojsonify(threads, 200)
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return ojsonify({"error": str(e)}, 500)
 
 
 @api_bp.route("/threads/<thread_id>", methods=["DELETE"])
@@ -112,49 +166,45 @@ def delete_thread(thread_id: str):
         if success:
             # Invalidate thread cache
             invalidate_thread_cache()
-            return jsonify({"message": "Thread deleted"}), 200
+            return ojsonify({"message": "Thread deleted"}, 200)
         else:
-            return jsonify({"error": "Thread not found"}), 404
+            return ojsonify({"error": "Thread not found"}, 404)
     except RuntimeError as e:
-        return jsonify({"error": str(e)}), 500
+        return ojsonify({"error": str(e)}, 500)
     except Exception as e:
-        return jsonify({"error": f"Failed to delete thread: {str(e)}"}), 500
+        return ojsonify({"error": f"Failed to delete thread: {str(e)}"}, 500)
 
 
 @api_bp.route("/threads/bulk", methods=["DELETE"])
 def delete_threads_bulk():
     """Delete multiple threads"""
     try:
-        data = request.get_json()
+        data = load_json()
         if not data or "thread_ids" not in data:
-            return jsonify({"error": "thread_ids array is required"}), 400
+            return ojsonify({"error": "thread_ids array is required"}, 400)
         
         thread_ids = data.get("thread_ids", [])
         if not isinstance(thread_ids, list):
-            return jsonify({"error": "thread_ids must be an array"}), 400
+            return ojsonify({"error": "thread_ids must be an array"}, 400)
         
         if len(thread_ids) == 0:
-            return jsonify({"message": "No threads to delete", "deleted": 0, "failed": 0}), 200
+            return ojsonify({"message": "No threads to delete", "deleted": 0, "failed": 0}, 200)
         
-        client = get_backboard_client()
         deleted_count = 0
         failed_count = 0
         errors = []
         
-        for thread_id in thread_ids:
-            try:
-                success = client.delete_thread(thread_id)
-                if success:
-                    deleted_count += 1
-                else:
-                    failed_count += 1
-                    errors.append(f"Thread {thread_id} not found")
-            except RuntimeError as e:
+        # Deletes are independent HTTP round-trips, so the client runs them concurrently
+        client = get_backboard_client()
+        for thread_id, outcome in zip(thread_ids, client.delete_threads(thread_ids)):
+            if isinstance(outcome, Exception):
                 failed_count += 1
-                errors.append(f"Thread {thread_id}: {str(e)}")
-            except Exception as e:
+                errors.append(f"Thread {thread_id}: {str(outcome)}")
+            elif outcome:
+                deleted_count += 1
+            else:
                 failed_count += 1
-                errors.append(f"Thread {thread_id}: {str(e)}")
+                errors.append(f"Thread {thread_id} not found")
         
         # Invalidate thread cache after bulk delete
         invalidate_thread_cache()
@@ -169,9 +219,9 @@ def delete_threads_bulk():
             result["errors"] = errors
         
         status_code = 200 if failed_count == 0 else 207  # 207 Multi-Status for partial success
-        return jsonify(result), status_code
+        return ojsonify(result, status_code)
     except Exception as e:
-        return jsonify({"error": f"Failed to delete threads: {str(e)}"}), 500
+        return ojsonify({"error": f"Failed to delete threads: {str(e)}"}, 500)
 
 
 @api_bp.route("/threads/<thread_id>/messages", methods=["GET"])
@@ -180,6 +230,6 @@ def get_thread_messages(thread_id: str):
     try:
         client = get_backboard_client()
         messages = client.get_thread_messages(thread_id)
-        return jsonify(messages), 200
+        return ojsonify(messages, 200)
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return ojsonify({"error": str(e)}, 500)
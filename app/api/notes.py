@@ -1,55 +1,139 @@
+import hashlib
 import json
 import re
+import threading
 from collections import Counter
-from flask import request, jsonify, Response, stream_with_context
+from typing import List
+import orjson
+from cachetools import TTLCache
+from flask import g, request, Response, stream_with_context
+from pydantic import TypeAdapter
 from app.api import api_bp
+from app.api._client import get_backboard_client
+from app.api._json import load_json, ojsonify, sse
 from app.models.note import Note, NoteCreate, NoteUpdate
-from app.services.backboard import BackboardClient
-from app.config import SETTINGS_FILE
 
+NDJSON_MIMETYPE = "application/x-ndjson"
 
-def get_backboard_client() -> BackboardClient:
-    """Get Backboard client from settings"""
-    try:
-        if SETTINGS_FILE.exists():
-            with open(SETTINGS_FILE, "r") as f:
-                settings_data = json.load(f)
-                api_key = settings_data.get("api_key", "")
-                base_url = settings_data.get("base_url", "https://app.backboard.io/api")
-                assistant_id = settings_data.get("assistant_id")
-                return BackboardClient(api_key, base_url, assistant_id=assistant_id)
-    except:
-        pass
+# Serializes a whole note list in one pydantic-core call
+_NOTES_ADAPTER = TypeAdapter(List[Note])
+
+# Patterns for pulling category tags out of LLM responses
+_JSON_ARRAY_RE = re.compile(r'\[.*?\]', re.DOTALL)
+_QUOTED_RE = re.compile(r'"([^"]+)"')
+
+# Constant parts of the category extraction prompt; only title and content vary
+_PROMPT_HEAD = "Analyze this note and suggest 3-5 relevant category tags. Return only a JSON array of tag names, nothing else.\n\nNote Title: "
+_PROMPT_MID = "\nNote Content: "
+_PROMPT_TAIL = '\n\nReturn format: ["tag1", "tag2", "tag3"]'
+
+# Short-lived cache so back-to-back requests share one remote list_notes fetch
+_notes_cache = TTLCache(maxsize=4, ttl=2)
+_notes_cache_lock = threading.Lock()
+
+def invalidate_notes_cache():
+    """Invalidate the cached note lists"""
+    with _notes_cache_lock:
+        _notes_cache.clear()
+
+
+def _etag_response(response: Response, etag: str) -> Response:
+    """Tag a notes-derived response so clients can revalidate with If-None-Match"""
+    response.set_etag(etag, weak=True)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+def _tagged_json_response(body: bytes) -> Response:
+    """JSON response tagged with a hash of its body, or a 304 if the client holds that body
+
+    The tag follows the content itself, so changes made elsewhere (chat memories,
+    other clients or processes) show up without anything here having to bump it.
+    """
+    etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+    if request.if_none_match.contains_weak(etag):
+        return _etag_response(Response(status=304), etag)
+    return _etag_response(Response(body, status=200, mimetype="application/json"), etag)
+
+
+def _list_notes_cached(client) -> list:
+    """List notes through the short-TTL cache, keyed on the client's account
+
+    A failed fetch raises before anything is cached, so the next request retries
+    instead of every endpoint seeing an empty note set for the TTL.
+    """
+    cache_key = (client.api_key, client.base_url, client._default_assistant_id)
+    with _notes_cache_lock:
+        notes = _notes_cache.get(cache_key)
+    if notes is None:
+        notes = client.list_notes()
+        with _notes_cache_lock:
+            _notes_cache[cache_key] = notes
+    return notes
+
+
+def _notes_index(client) -> dict:
+    """Map note id -> Note, built once per request"""
+    index = g.get("notes_index")
+    if index is None:
+        index = {note.id: note for note in _list_notes_cached(client)}
+        g.notes_index = index
+    return index
+
+
+def _category_prompt(note: Note) -> str:
+    """Build the LLM prompt asking for category tags for a note"""
+    return _PROMPT_HEAD + note.title + _PROMPT_MID + note.content[:1000] + _PROMPT_TAIL
+
+
+def _ndjson_notes_response(notes) -> Response:
+    """Stream notes as newline-delimited JSON, encoding one note at a time"""
+    def generate():
+        for note in notes:
+            yield orjson.dumps(note.model_dump()) + b"\n"
     
-    # Fallback to defaults
-    from app.config import Config
-    return BackboardClient(Config.BACKBOARD_API_KEY, Config.BACKBOARD_BASE_URL)
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
 
 
 @api_bp.route("/notes", methods=["GET"])
 def list_notes():
-    """List all notes"""
+    """List all notes (as NDJSON when the client accepts application/x-ndjson)"""
     try:
+        if request.accept_mimetypes.best_match(["application/json", NDJSON_MIMETYPE]) == NDJSON_MIMETYPE:
+            client = get_backboard_client()
+            return _ndjson_notes_response(_list_notes_cached(client))
+        
         client = get_backboard_client()
-        notes = client.list_notes()
-        return jsonify([note.model_dump() for note in notes]), 200
+        notes = _list_notes_cached(client)
+        return _tagged_json_response(_NOTES_ADAPTER.dump_json(notes))
+    except Exception as e:
+        return ojsonify({"error": str(e)}, 500)
+
+
+@api_bp.route("/notes/stream", methods=["GET"])
+def stream_notes():
+    """Stream all notes as newline-delimited JSON"""
+    try:
+        client = get_backboard_client()
+        return _ndjson_notes_response(_list_notes_cached(client))
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return ojsonify({"error": str(e)}, 500)
 
 
 @api_bp.route("/notes", methods=["POST"])
 def create_note():
     """Create a new note"""
     try:
-        data = request.get_json()
+        data = load_json()
         note_create = NoteCreate(**data)
         
         client = get_backboard_client()
         note = client.create_note(note_create)
+        invalidate_notes_cache()
         
-        return jsonify(note.model_dump()), 201
+        return ojsonify(note.model_dump(), 201)
     except Exception as e:
-        return jsonify({"error": str(e)}), 400
+        return ojsonify({"error": str(e)}, 400)
 
 
 @api_bp.route("/notes/<note_id>", methods=["GET"])
@@ -60,29 +144,30 @@ def get_note(note_id: str):
         note = client.get_note(note_id)
         
         if note:
-            return jsonify(note.model_dump()), 200
+            return ojsonify(note.model_dump(), 200)
         else:
-            return jsonify({"error": "Note not found"}), 404
+            return ojsonify({"error": "Note not found"}, 404)
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return ojsonify({"error": str(e)}, 500)
 
 
 @api_bp.route("/notes/<note_id>", methods=["PUT"])
 def update_note(note_id: str):
     """Update a note"""
     try:
-        data = request.get_json()
+        data = load_json()
         note_update = NoteUpdate(**data)
         
         client = get_backboard_client()
         note = client.update_note(note_id, note_update)
+        invalidate_notes_cache()
         
         if note:
-            return jsonify(note.model_dump()), 200
+            return ojsonify(note.model_dump(), 200)
         else:
-            return jsonify({"error": "Note not found"}), 404
+            return ojsonify({"error": "Note not found"}, 404)
     except Exception as e:
-        return jsonify({"error": str(e)}), 400
+        return ojsonify({"error": str(e)}, 400)
 
 
 @api_bp.route("/notes/<note_id>", methods=["DELETE"])
@@ -91,52 +176,51 @@ def delete_note(note_id: str):
     try:
         client = get_backboard_client()
         success = client.delete_note(note_id)
+        invalidate_notes_cache()
         
         if success:
-            return jsonify({"message": "Note deleted"}), 200
+            return ojsonify({"message": "Note deleted"}, 200)
         else:
-            return jsonify({"error": "Note not found"}), 404
+            return ojsonify({"error": "Note not found"}, 404)
     except RuntimeError as e:
         # RuntimeError from BackboardClient contains the actual error message
-        return jsonify({"error": str(e)}), 500
+        return ojsonify({"error": str(e)}, 500)
     except Exception as e:
-        return jsonify({"error": f"Failed to delete note: {str(e)}"}), 500
+        return ojsonify({"error": f"Failed to delete note: {str(e)}"}, 500)
 
 
 @api_bp.route("/notes/bulk", methods=["DELETE"])
 def delete_notes_bulk():
     """Delete multiple notes"""
     try:
-        data = request.get_json()
+        data = load_json()
         if not data or "note_ids" not in data:
-            return jsonify({"error": "note_ids array is required"}), 400
+            return ojsonify({"error": "note_ids array is required"}, 400)
         
         note_ids = data.get("note_ids", [])
         if not isinstance(note_ids, list):
-            return jsonify({"error": "note_ids must be an array"}), 400
+            return ojsonify({"error": "note_ids must be an array"}, 400)
         
         if len(note_ids) == 0:
-            return jsonify({"message": "No notes to delete", "deleted": 0, "failed": 0}), 200
+            return ojsonify({"message": "No notes to delete", "deleted": 0, "failed": 0}, 200)
         
-        client = get_backboard_client()
         deleted_count = 0
         failed_count = 0
         errors = []
         
-        for note_id in note_ids:
-            try:
-                success = client.delete_note(note_id)
-                if success:
-                    deleted_count += 1
-                else:
-                    failed_count += 1
-                    errors.append(f"Note {note_id} not found")
-            except RuntimeError as e:
+        # Deletes are independent HTTP round-trips, so the client issues them concurrently
+        client = get_backboard_client()
+        for note_id, outcome in zip(note_ids, client.delete_notes(note_ids)):
+            if isinstance(outcome, Exception):
                 failed_count += 1
-                errors.append(f"Note {note_id}: {str(e)}")
-            except Exception as e:
+                errors.append(f"Note {note_id}: {str(outcome)}")
+            elif outcome:
+                deleted_count += 1
+            else:
                 failed_count += 1
-                errors.append(f"Note {note_id}: {str(e)}")
+                errors.append(f"Note {note_id} not found")
+        
+        invalidate_notes_cache()
         
         result = {
             "message": f"Deleted {deleted_count} note(s), {failed_count} failed",
@@ -148,9 +232,9 @@ def delete_notes_bulk():
             result["errors"] = errors
         
         status_code = 200 if failed_count == 0 else 207  # 207 Multi-Status for partial success
-        return jsonify(result), status_code
+        return ojsonify(result, status_code)
     except Exception as e:
-        return jsonify({"error": f"Failed to delete notes: {str(e)}"}), 500
+        return ojsonify({"error": f"Failed to delete notes: {str(e)}"}, 500)
 
 
 @api_bp.route("/categories", methods=["GET"])
@@ -158,7 +242,7 @@ def list_categories():
     """List all categories with note counts"""
     try:
         client = get_backboard_client()
-        notes = client.list_notes()
+        notes = _list_notes_cached(client)
         
         # Count categories across all notes
         category_counter = Counter()
@@ -169,9 +253,9 @@ def list_categories():
         # Convert to list of dicts with counts
         categories = [{"name": name, "count": count} for name, count in category_counter.most_common()]
         
-        return jsonify(categories), 200
+        return _tagged_json_response(orjson.dumps(categories))
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return ojsonify({"error": str(e)}, 500)
 
 
 @api_bp.route("/categories/<category_name>", methods=["DELETE"])
@@ -179,39 +263,46 @@ def delete_category(category_name: str):
     """Delete a category from all notes"""
     try:
         client = get_backboard_client()
-        notes = client.list_notes()
+        notes = _list_notes_cached(client)
         
-        updated_count = 0
-        for note in notes:
-            if note.categories and category_name in note.categories:
-                # Remove category from note
-                updated_categories = [c for c in note.categories if c != category_name]
-                
-                # Since update_note creates a new note (can't match IDs), we need to:
-                # 1. Delete the old note
-                # 2. Create a new note with updated categories
+        matched_notes = [note for note in notes if note.categories and category_name in note.categories]
+        
+        # Since update_note creates a new note (can't match IDs), we need to:
+        # 1. Delete the old notes
+        # 2. Create new notes with updated categories
+        # Each step is one concurrent batch on this client
+        outcomes = []
+        if matched_notes:
+            try:
                 try:
-                    # Try to delete the old note (may fail if ID doesn't match, but that's ok)
-                    client.delete_note(note.id)
-                except:
+                    # Deletes may fail if IDs don't match, but that's ok
+                    client.delete_notes([note.id for note in matched_notes])
+                except RuntimeError:
                     pass  # Ignore delete errors
                 
-                # Create new note with updated categories
-                note_create = NoteCreate(
-                    title=note.title,
-                    content=note.content,
-                    categories=updated_categories
-                )
-                updated_note = client.create_note(note_create)
-                if updated_note:
-                    updated_count += 1
-        
-        return jsonify({
+                outcomes = client.create_notes([
+                    NoteCreate(
+                        title=note.title,
+                        content=note.content,
+                        categories=[c for c in note.categories if c != category_name]
+                    )
+                    for note in matched_notes
+                ])
+            finally:
+                # Some notes may have changed even if others failed
+                invalidate_notes_cache()
+        
+        updated_count = sum(1 for outcome in outcomes if outcome and not isinstance(outcome, Exception))
+        first_error = next((outcome for outcome in outcomes if isinstance(outcome, Exception)), None)
+        if first_error is not None:
+            raise first_error
+        
+        return ojsonify({
             "message": f"Category '{category_name}' removed from {updated_count} note(s)",
             "updated_count": updated_count
-        }), 200
+        }, 200)
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return ojsonify({"error": str(e)}, 500)
 
 
 @api_bp.route("/notes/<note_id>/extract-categories", methods=["POST"])
@@ -220,19 +311,13 @@ def extract_categories(note_id: str):
     try:
         client = get_backboard_client()
         # Get note from list since get_note doesn't work with memory IDs
-        all_notes = client.list_notes()
-        note = next((n for n in all_notes if n.id == note_id), None)
+        note = _notes_index(client).get(note_id)
         
         if not note:
-            return jsonify({"error": "Note not found"}), 404
+            return ojsonify({"error": "Note not found"}, 404)
         
         # Prepare prompt for LLM
-        prompt = f"""Analyze this note and suggest 3-5 relevant category tags. Return only a JSON array of tag names, nothing else.
-
-Note Title: {note.title}
-Note Content: {note.content[:1000]}
-
-Return format: ["tag1", "tag2", "tag3"]"""
+        prompt = _category_prompt(note)
 
         # Use Backboard LLM to extract categories
         assistant_id = client._get_or_create_default_assistant()
@@ -244,7 +329,7 @@ Return format: ["tag1", "tag2", "tag3"]"""
         # Try to extract JSON array from response
         categories = []
         # Look for JSON array pattern
-        json_match = re.search(r'\[.*?\]', response_text, re.DOTALL)
+        json_match = _JSON_ARRAY_RE.search(response_text)
         if json_match:
             try:
                 categories = json.loads(json_match.group(0))
@@ -252,12 +337,12 @@ Return format: ["tag1", "tag2", "tag3"]"""
                     categories = []
             except json.JSONDecodeError:
                 # Try to extract quoted strings
-                quoted_matches = re.findall(r'"([^"]+)"', response_text)
+                quoted_matches = _QUOTED_RE.findall(response_text)
                 categories = quoted_matches[:5]  # Limit to 5 categories
         
-        # Merge with existing categories (avoid duplicates)
+        # Merge with existing categories (avoid duplicates, keep order)
         existing_categories = note.categories or []
-        all_categories = list(set(existing_categories + categories))
+        all_categories = list(dict.fromkeys(existing_categories + categories))
         
         # Since update_note creates a new note (can't match IDs), we need to:
         # 1. Delete the old note
@@ -275,32 +360,33 @@ Return format: ["tag1", "tag2", "tag3"]"""
             categories=all_categories
         )
         updated_note = client.create_note(note_create)
+        invalidate_notes_cache()
         
         if updated_note:
-            return jsonify({
+            return ojsonify({
                 "message": f"Extracted {len(categories)} categories",
                 "extracted_categories": categories,
                 "note": updated_note.model_dump(mode='json')
-            }), 200
+            }, 200)
         else:
-            return jsonify({"error": "Failed to update note"}), 500
+            return ojsonify({"error": "Failed to update note"}, 500)
             
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return ojsonify({"error": str(e)}, 500)
 
 
 @api_bp.route("/notes/bulk/extract-categories", methods=["POST"])
 def extract_categories_bulk():
     """Extract categories for multiple notes - streams progress updates"""
     try:
-        data = request.get_json()
+        data = load_json()
         note_ids = data.get("note_ids", []) if data else []
         
         if not isinstance(note_ids, list):
-            return jsonify({"error": "note_ids must be an array"}), 400
+            return ojsonify({"error": "note_ids must be an array"}, 400)
         
         if len(note_ids) == 0:
-            return jsonify({"message": "No notes to process", "processed": 0, "failed": 0}), 200
+            return ojsonify({"message": "No notes to process", "processed": 0, "failed": 0}, 200)
         
         client = get_backboard_client()
         
@@ -309,12 +395,11 @@ def extract_categories_bulk():
             failed_count = 0
             errors = []
             
-            yield f"data: {json.dumps({'type': 'start', 'message': f'Starting extraction for {len(note_ids)} notes...', 'total': len(note_ids)})}\n\n"
+            yield sse({'type': 'start', 'message': f'Starting extraction for {len(note_ids)} notes...', 'total': len(note_ids)})
             
             # Get all notes once to find notes by ID (since get_note doesn't work with memory IDs)
-            yield f"data: {json.dumps({'type': 'status', 'message': 'Loading notes...'})}\n\n"
-            all_notes = client.list_notes()
-            notes_by_id = {note.id: note for note in all_notes}
+            yield sse({'type': 'status', 'message': 'Loading notes...'})
+            notes_by_id = _notes_index(client)
             
             for i, note_id in enumerate(note_ids):
                 try:
@@ -323,25 +408,20 @@ def extract_categories_bulk():
                     if not note:
                         failed_count += 1
                         errors.append(f"Note {note_id} not found")
-                        yield f"data: {json.dumps({'type': 'error', 'note_id': note_id, 'note_title': 'Unknown', 'error': 'Note not found'})}\n\n"
-                        yield f"data: {json.dumps({'type': 'progress', 'current': i + 1, 'total': len(note_ids), 'processed': processed_count, 'failed': failed_count})}\n\n"
+                        yield sse({'type': 'error', 'note_id': note_id, 'note_title': 'Unknown', 'error': 'Note not found'})
+                        yield sse({'type': 'progress', 'current': i + 1, 'total': len(note_ids), 'processed': processed_count, 'failed': failed_count})
                         continue
                     
-                    yield f"data: {json.dumps({'type': 'status', 'message': f'Processing: {note.title[:50]}...', 'note_id': note_id, 'note_title': note.title})}\n\n"
+                    yield sse({'type': 'status', 'message': f'Processing: {note.title[:50]}...', 'note_id': note_id, 'note_title': note.title})
                     
                     # Extract categories
-                    prompt = f"""Analyze this note and suggest 3-5 relevant category tags. Return only a JSON array of tag names, nothing else.
-
-Note Title: {note.title}
-Note Content: {note.content[:1000]}
-
-Return format: ["tag1", "tag2", "tag3"]"""
+                    prompt = _category_prompt(note)
                     
                     assistant_id = client._get_or_create_default_assistant()
                     result = client.chat(prompt, assistant_id=assistant_id)
                     
                     response_text = result.get("response", "") if isinstance(result, dict) else str(result)
-                    json_match = re.search(r'\[.*?\]', response_text, re.DOTALL)
+                    json_match = _JSON_ARRAY_RE.search(response_text)
                     categories = []
                     if json_match:
                         try:
@@ -349,12 +429,12 @@ Return format: ["tag1", "tag2", "tag3"]"""
                             if not isinstance(categories, list):
                                 categories = []
                         except json.JSONDecodeError:
-                            quoted_matches = re.findall(r'"([^"]+)"', response_text)
+                            quoted_matches = _QUOTED_RE.findall(response_text)
                             categories = quoted_matches[:5]
                     
                     # Merge with existing
                     existing_categories = note.categories or []
-                    all_categories = list(set(existing_categories + categories))
+                    all_categories = list(dict.fromkeys(existing_categories + categories))
                     
                     # Since update_note creates a new note (can't match IDs), we need to:
                     # 1. Delete the old note
@@ -377,33 +457,30 @@ Return format: ["tag1", "tag2", "tag3"]"""
                         processed_count += 1
                         # Use model_dump with mode='json' to properly serialize datetime objects
                         note_dict = updated_note.model_dump(mode='json')
-                        yield f"data: {json.dumps({'type': 'note', 'note_id': note_id, 'note_title': note.title, 'extracted_categories': categories, 'all_categories': all_categories, 'note': note_dict})}\n\n"
+                        yield sse({'type': 'note', 'note_id': note_id, 'note_title': note.title, 'extracted_categories': categories, 'all_categories': all_categories, 'note': note_dict})
                     else:
                         failed_count += 1
                         errors.append(f"Note {note_id}: Failed to update")
-                        yield f"data: {json.dumps({'type': 'error', 'note_id': note_id, 'note_title': note.title, 'error': 'Failed to update'})}\n\n"
+                        yield sse({'type': 'error', 'note_id': note_id, 'note_title': note.title, 'error': 'Failed to update'})
                     
                     # Progress update
-                    yield f"data: {json.dumps({'type': 'progress', 'current': i + 1, 'total': len(note_ids), 'processed': processed_count, 'failed': failed_count})}\n\n"
+                    yield sse({'type': 'progress', 'current': i + 1, 'total': len(note_ids), 'processed': processed_count, 'failed': failed_count})
                     
                 except Exception as e:
                     failed_count += 1
                     error_msg = str(e)
                     errors.append(f"Note {note_id}: {error_msg}")
-                    note_title = 'Unknown'
-                    try:
-                        note = client.get_note(note_id)
-                        if note:
-                            note_title = note.title
-                    except:
-                        pass
-                    yield f"data: {json.dumps({'type': 'error', 'note_id': note_id, 'note_title': note_title, 'error': error_msg})}\n\n"
-                    yield f"data: {json.dumps({'type': 'progress', 'current': i + 1, 'total': len(note_ids), 'processed': processed_count, 'failed': failed_count})}\n\n"
+                    known_note = notes_by_id.get(note_id)
+                    note_title = known_note.title if known_note else 'Unknown'
+                    yield sse({'type': 'error', 'note_id': note_id, 'note_title': note_title, 'error': error_msg})
+                    yield sse({'type': 'progress', 'current': i + 1, 'total': len(note_ids), 'processed': processed_count, 'failed': failed_count})
+            
+            invalidate_notes_cache()
             
             # Final summary
-            yield f"data: {json.dumps({'type': 'complete', 'message': f'Extraction complete: {processed_count} processed, {failed_count} failed', 'processed': processed_count, 'failed': failed_count, 'errors': errors})}\n\n"
+            yield sse({'type': 'complete', 'message': f'Extraction complete: {processed_count} processed, {failed_count} failed', 'processed': processed_count, 'failed': failed_count, 'errors': errors})
         
         return Response(stream_with_context(generate()), mimetype='text/event-stream')
         
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return ojsonify({"error": str(e)}, 500)
\ No newline at end of file
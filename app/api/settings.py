@@ -1,39 +1,44 @@
-import json
-from flask import request, jsonify
+import hashlib
+import logging
+import threading
+from cachetools import TTLCache
+from flask import request, jsonify, Response
 from app.api import api_bp
+from app.api._client import get_backboard_client, invalidate_client_cache
+from app.api._json import load_json
+from app.api.notes import invalidate_notes_cache
+from app.async_runtime import run_all, run_coro
 from app.models.settings import Settings, SettingsUpdate
-from app.config import SETTINGS_FILE
-from app.services.backboard import BackboardClient
+from app.config import SETTINGS_FILE, read_settings_file, write_settings_file
 
-# Cache for assistant list with memory counts
-_assistant_cache = None
+logger = logging.getLogger(__name__)
+
+# Cache for assistant list with memory counts, per (API key hash, base URL)
+_assistant_cache = TTLCache(maxsize=16, ttl=300)
+_assistant_cache_lock = threading.Lock()
 
 def invalidate_assistant_cache():
     """Invalidate the assistant list cache"""
-    global _assistant_cache
-    _assistant_cache = None
+    with _assistant_cache_lock:
+        _assistant_cache.clear()
+
+
+def _assistant_cache_key(client) -> tuple:
+    """Cache key for a client's account (the raw API key is not kept in memory as a key)"""
+    api_key_hash = hashlib.blake2b((client.api_key or "").encode(), digest_size=8).hexdigest()
+    return api_key_hash, client.base_url
 
 
 def get_app_assistant_ids() -> list:
     """Get list of assistant IDs created by this app"""
-    try:
-        if SETTINGS_FILE.exists():
-            with open(SETTINGS_FILE, "r") as f:
-                settings_data = json.load(f)
-                return settings_data.get("app_assistant_ids", [])
-    except:
-        pass
-    return []
+    return read_settings_file().get("app_assistant_ids", [])
 
 
 def add_app_assistant_id(assistant_id: str):
     """Add an assistant ID to the app_assistant_ids list"""
     try:
         # Load existing settings
-        current_settings = {}
-        if SETTINGS_FILE.exists():
-            with open(SETTINGS_FILE, "r") as f:
-                current_settings = json.load(f)
+        current_settings = read_settings_file()
         
         # Get current list
         app_assistant_ids = current_settings.get("app_assistant_ids", [])
@@ -47,42 +52,24 @@ def add_app_assistant_id(assistant_id: str):
             current_settings["app_assistant_ids"] = app_assistant_ids
             
             # Save to file
-            SETTINGS_FILE.parent.mkdir(parents=True, exist_ok=True)
-            with open(SETTINGS_FILE, "w") as f:
-                json.dump(current_settings, f, indent=2)
+            write_settings_file(current_settings)
     except Exception as e:
         # Log error but don't fail - this is not critical
-        import logging
-        logging.warning(f"Failed to save app_assistant_id: {str(e)}")
-
-
-def get_backboard_client() -> BackboardClient:
-    """Get Backboard client from settings"""
-    try:
-        if SETTINGS_FILE.exists():
-            with open(SETTINGS_FILE, "r") as f:
-                settings_data = json.load(f)
-                api_key = settings_data.get("api_key", "")
-                base_url = settings_data.get("base_url", "https://app.backboard.io/api")
-                assistant_id = settings_data.get("assistant_id")
-                return BackboardClient(api_key, base_url, assistant_id=assistant_id)
-    except:
-        pass
-    
-    # Fallback to defaults
-    from app.config import Config
-    return BackboardClient(Config.BACKBOARD_API_KEY, Config.BACKBOARD_BASE_URL)
+        logger.warning("Failed to save app_assistant_id: %s", e)
 
 
 @api_bp.route("/settings", methods=["GET"])
 def get_settings():
     """Get current settings"""
     try:
-        if SETTINGS_FILE.exists():
-            with open(SETTINGS_FILE, "r") as f:
-                settings_data = json.load(f)
-                settings = Settings(**settings_data)
-                return jsonify(settings.model_dump()), 200
+        try:
+            settings_bytes = SETTINGS_FILE.read_bytes()
+        except FileNotFoundError:
+            settings_bytes = None
+        
+        if settings_bytes is not None:
+            settings = Settings.model_validate_json(settings_bytes)
+            return Response(settings.model_dump_json(), status=200, mimetype="application/json")
         else:
             # Return defaults
             from app.config import Config
@@ -92,7 +79,7 @@ def get_settings():
                 base_url=Config.BACKBOARD_BASE_URL,
                 sync_enabled=True
             )
-            return jsonify(settings.model_dump()), 200
+            return Response(settings.model_dump_json(), status=200, mimetype="application/json")
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -101,14 +88,10 @@ def get_settings():
 def update_settings():
     """Update settings"""
     try:
-        data = request.get_json()
-        settings_update = SettingsUpdate(**data)
+        settings_update = SettingsUpdate.model_validate_json(request.get_data())
         
         # Load existing settings
-        current_settings = {}
-        if SETTINGS_FILE.exists():
-            with open(SETTINGS_FILE, "r") as f:
-                current_settings = json.load(f)
+        current_settings = read_settings_file()
         
         # Update with new values
         update_dict = settings_update.model_dump(exclude_unset=True)
@@ -125,12 +108,14 @@ def update_settings():
                 current_settings["app_assistant_ids"] = app_assistant_ids
         
         # Save to file
-        SETTINGS_FILE.parent.mkdir(parents=True, exist_ok=True)
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(current_settings, f, indent=2)
+        write_settings_file(current_settings)
+        
+        # Notes listed under the old settings may belong to another account
+        invalidate_client_cache()
+        invalidate_notes_cache()
         
-        settings = Settings(**current_settings)
-        return jsonify(settings.model_dump()), 200
+        settings = Settings.model_validate(current_settings)
+        return Response(settings.model_dump_json(), status=200, mimetype="application/json")
         
     except Exception as e:
         return jsonify({"error": str(e)}), 400
@@ -139,28 +124,19 @@ def update_settings():
 @api_bp.route("/assistants", methods=["GET"])
 def list_assistants():
     """List all assistants with memory counts (cached)"""
-    global _assistant_cache
-    
-    # Return cached result if available
-    if _assistant_cache is not None:
-        return jsonify(_assistant_cache), 200
-    
     try:
         client = get_backboard_client()
+        cache_key = _assistant_cache_key(client)
+        
+        # Return cached result if available
+        with _assistant_cache_lock:
+            cached = _assistant_cache.get(cache_key)
+        if cached is not None:
+            return jsonify(cached), 200
         
         # Use SDK's list_assistants method
-        if hasattr(client.sdk_client, 'list_assistants'):
-            import asyncio
-            try:
-                loop = asyncio.get_event_loop()
-                if loop.is_closed():
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-            except RuntimeError:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-            
-            assistants = loop.run_until_complete(client.sdk_client.list_assistants())
+        if client.has_sdk_method('list_assistants'):
+            assistants = run_coro(client.sdk_client.list_assistants())
             
             # Get list of app-owned assistant IDs
             app_assistant_ids = get_app_assistant_ids()
@@ -186,19 +162,21 @@ def list_assistants():
                     
                     name = assistant_dict.get('name', 'Untitled')
                     
-                    # Get memory count for this assistant
-                    memory_count = 0
-                    if assistant_id:
-                        memory_count = client.get_memory_count(assistant_id_str)
-                    
                     result.append({
                         'assistant_id': assistant_id_str,
                         'name': name,
-                        'memory_count': memory_count
+                        'memory_count': 0
                     })
             
+            # Memory counts are independent round-trips, so fetch them concurrently
+            counted = [entry for entry in result if entry['assistant_id']]
+            counts = run_all([client.get_memory_count_async(entry['assistant_id']) for entry in counted])
+            for entry, memory_count in zip(counted, counts):
+                entry['memory_count'] = memory_count
+            
             # Cache the result
-            _assistant_cache = result
+            with _assistant_cache_lock:
+                _assistant_cache[cache_key] = result
             
             return jsonify(result), 200
         else:
@@ -211,10 +189,8 @@ def list_assistants():
 @api_bp.route("/assistants", methods=["POST"])
 def create_assistant():
     """Create a new assistant"""
-    global _assistant_cache
-    
     try:
-        data = request.get_json() or {}
+        data = load_json()
         name = data.get("name", "Notes")
         
         if not name:
@@ -223,18 +199,8 @@ def create_assistant():
         client = get_backboard_client()
         
         # Use SDK's create_assistant method
-        if hasattr(client.sdk_client, 'create_assistant'):
-            import asyncio
-            try:
-                loop = asyncio.get_event_loop()
-                if loop.is_closed():
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-            except RuntimeError:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-            
-            assistant = loop.run_until_complete(client.sdk_client.create_assistant(name=name))
+        if client.has_sdk_method('create_assistant'):
+            assistant = run_coro(client.sdk_client.create_assistant(name=name))
             
             # Convert to dict
             if isinstance(assistant, dict):
@@ -252,7 +218,7 @@ def create_assistant():
             add_app_assistant_id(assistant_id_str)
             
             # Invalidate cache when a new assistant is created
-            _assistant_cache = None
+            invalidate_assistant_cache()
             
             return jsonify({
                 'assistant_id': assistant_id_str,
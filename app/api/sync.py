@@ -1,28 +1,59 @@
-import json
-import os
-from flask import request, jsonify, Response, stream_with_context
+import threading
+import orjson
+from flask import current_app, request, jsonify, Response, stream_with_context
 from app.api import api_bp
+from app.api._client import create_backboard_client, get_backboard_client
+from app.api._json import sse
 from app.services.apple_notes import AppleNotesReader
-from app.services.backboard import BackboardClient
-from app.config import SETTINGS_FILE
 from app.api.settings import invalidate_assistant_cache
+from app.api.notes import invalidate_notes_cache
+
+# Buffered import events are flushed once they reach this size or note count
+_SSE_FLUSH_BYTES = 4096
+_SSE_FLUSH_NOTES = 32
+
+# Fixed parts of the per-note events; only the note and error text go through orjson
+_NOTE_EVENT_PREFIX = b'data: {"type":"note","note":'
+_ERROR_EVENT_PREFIX = b'data: {"type":"error","note":'
+_ERROR_FIELD = b',"error":'
+_COUNTS_SUFFIX = b',"current":%d,"total":%d,"imported":%d,"errors":%d}\n\n'
+
+
+def _note_event(note_dict: dict, current: int, total: int, imported: int, errors: int) -> bytes:
+    """SSE frame for a synced note"""
+    return _NOTE_EVENT_PREFIX + orjson.dumps(note_dict) + _COUNTS_SUFFIX % (current, total, imported, errors)
+
+
+def _error_event(note, error: str, current: int, total: int, imported: int, errors: int) -> bytes:
+    """SSE frame for a note that failed to sync"""
+    return (
+        _ERROR_EVENT_PREFIX + orjson.dumps({'id': note.id, 'title': note.title})
+        + _ERROR_FIELD + orjson.dumps(error)
+        + _COUNTS_SUFFIX % (current, total, imported, errors)
+    )
+
+_reader_lock = threading.Lock()
 
-def get_backboard_client() -> BackboardClient:
-    """Get Backboard client from settings"""
-    try:
-        if SETTINGS_FILE.exists():
-            with open(SETTINGS_FILE, "r") as f:
-                settings_data = json.load(f)
-                api_key = settings_data.get("api_key", "")
-                base_url = settings_data.get("base_url", "https://app.backboard.io/api")
-                assistant_id = settings_data.get("assistant_id")
-                return BackboardClient(api_key, base_url, assistant_id=assistant_id)
-    except Exception as e:
-        pass
-    
-    # Fallback to defaults
-    from app.config import Config
-    return BackboardClient(Config.BACKBOARD_API_KEY, Config.BACKBOARD_BASE_URL)
+
+def _get_notes_reader() -> AppleNotesReader:
+    """Return the app's shared AppleNotesReader, creating it on first use"""
+    reader = current_app.extensions.get("notes_reader")
+    if reader is None:
+        with _reader_lock:
+            reader = current_app.extensions.get("notes_reader")
+            if reader is None:
+                # Raises off macOS; nothing is stored then, so every request reports it
+                reader = AppleNotesReader(use_cache=True)
+                current_app.extensions["notes_reader"] = reader
+    return reader
+
+def _sync_notes_concurrently(client, notes: list):
+    """Sync notes to Backboard.io concurrently, yielding (note, synced_note, error) as each finishes"""
+    for note, outcome in client.iter_sync_notes(notes):
+        if isinstance(outcome, Exception):
+            yield note, None, outcome
+        else:
+            yield note, outcome, None
 
 @api_bp.route("/sync/import", methods=["POST"])
 def import_notes():
@@ -32,35 +63,30 @@ def import_notes():
         first_n = data.get('first_n')
         last_n = data.get('last_n')
         
-        reader = AppleNotesReader()
+        reader = _get_notes_reader()
         # Use cached version for faster processing
         force_refresh = data.get('force_refresh', False)
-        apple_notes = reader.get_all_notes_cached(force_refresh=force_refresh)
-        
-        # Apply limits if specified
-        if first_n is not None and first_n > 0:
-            apple_notes = apple_notes[:first_n]
-        elif last_n is not None and last_n > 0:
-            apple_notes = apple_notes[-last_n:]
+        apple_notes, _ = reader.get_notes_cached(force_refresh=force_refresh, first_n=first_n, last_n=last_n)
         
-        client = get_backboard_client()
         synced_notes = []
         errors = []
         
-        for note in apple_notes:
-            try:
-                synced_note = client.sync_note(note)
-                if synced_note:
-                    synced_notes.append(synced_note.model_dump())
-            except Exception as e:
+        client = get_backboard_client()
+        # Nothing is streamed here, so the whole batch goes out in one gather
+        outcomes = client.sync_notes(apple_notes)
+        for note, outcome in zip(apple_notes, outcomes):
+            if isinstance(outcome, Exception):
                 errors.append({
                     "note_id": note.id,
                     "title": note.title,
-                    "error": str(e)
+                    "error": str(outcome)
                 })
+            elif outcome:
+                synced_notes.append(outcome.model_dump())
         
         # Invalidate assistant cache since memory counts may have changed
         invalidate_assistant_cache()
+        invalidate_notes_cache()
         
         return jsonify({
             "parsed": len(apple_notes),
@@ -78,67 +104,80 @@ def import_notes_stream():
     source = request.args.get('source', 'apple')
     first_n = request.args.get('first_n', type=int)
     last_n = request.args.get('last_n', type=int)
+    force_refresh = request.args.get('force_refresh', 'false').lower() == 'true'
+    
+    # Set up before streaming so the generator only does the import itself
+    try:
+        reader = _get_notes_reader()
+        # Owned by the response, which closes it once the stream ends
+        client = create_backboard_client()
+    except Exception as e:
+        return Response(sse({'type': 'error', 'error': str(e), 'message': f'Import failed: {str(e)}'}), mimetype='text/event-stream')
     
     def generate():
         try:
             # Send initial status
-            yield f"data: {json.dumps({'type': 'start', 'message': 'Starting import...'})}\n\n"
+            yield sse({'type': 'start', 'message': 'Starting import...'})
             
             # Read Apple Notes
-            reader = AppleNotesReader()
-            force_refresh = request.args.get('force_refresh', 'false').lower() == 'true'
             if force_refresh:
-                yield f"data: {json.dumps({'type': 'status', 'message': 'Reading notes from Apple Notes (cache refresh)...'})}\n\n"
+                yield sse({'type': 'status', 'message': 'Reading notes from Apple Notes (cache refresh)...'})
             else:
-                yield f"data: {json.dumps({'type': 'status', 'message': 'Reading notes from Apple Notes (using cache if available)...'})}\n\n"
-            apple_notes = reader.get_all_notes_cached(force_refresh=force_refresh)
+                yield sse({'type': 'status', 'message': 'Reading notes from Apple Notes (using cache if available)...'})
+            # Limits are applied by the reader, so a cold cache only reads the requested notes
+            apple_notes, original_count = reader.get_notes_cached(force_refresh=force_refresh, first_n=first_n, last_n=last_n)
             
-            # Apply limits if specified
-            original_count = len(apple_notes)
             if first_n is not None and first_n > 0:
-                apple_notes = apple_notes[:first_n]
-                yield f"data: {json.dumps({'type': 'status', 'message': f'Limiting to first {first_n} notes (out of {original_count} total)'})}\n\n"
+                yield sse({'type': 'status', 'message': f'Limiting to first {first_n} notes (out of {original_count} total)'})
             elif last_n is not None and last_n > 0:
-                apple_notes = apple_notes[-last_n:]
-                yield f"data: {json.dumps({'type': 'status', 'message': f'Limiting to last {last_n} notes (out of {original_count} total)'})}\n\n"
+                yield sse({'type': 'status', 'message': f'Limiting to last {last_n} notes (out of {original_count} total)'})
             
             total = len(apple_notes)
             
-            yield f"data: {json.dumps({'type': 'progress', 'total': total, 'current': 0, 'message': f'Found {total} notes to import'})}\n\n"
+            yield sse({'type': 'progress', 'total': total, 'current': 0, 'message': f'Found {total} notes to import'})
             
-            # Sync to Backboard.io
-            client = get_backboard_client()
+            # Sync to Backboard.io (events follow completion order). Each note or
+            # error event carries the running counts, so there's no separate
+            # progress event, and events are written in batches rather than one
+            # chunk per note
             synced_count = 0
             error_count = 0
+            buffer = bytearray()
             
-            for idx, note in enumerate(apple_notes, 1):
-                try:
-                    synced_note = client.sync_note(note)
-                    if synced_note:
-                        synced_count += 1
-                        # Use model_dump with mode='json' to properly serialize datetime objects
-                        note_dict = synced_note.model_dump(mode='json')
-                        yield f"data: {json.dumps({'type': 'note', 'note': note_dict, 'current': idx, 'total': total, 'imported': synced_count, 'errors': error_count})}\n\n"
-                    else:
-                        error_count += 1
-                        yield f"data: {json.dumps({'type': 'error', 'note': {'id': note.id, 'title': note.title}, 'error': 'Failed to sync', 'current': idx, 'total': total, 'imported': synced_count, 'errors': error_count})}\n\n"
-                except Exception as e:
+            for idx, (note, synced_note, error) in enumerate(_sync_notes_concurrently(client, apple_notes), 1):
+                if error is not None:
                     error_count += 1
-                    yield f"data: {json.dumps({'type': 'error', 'note': {'id': note.id, 'title': note.title}, 'error': str(e), 'current': idx, 'total': total, 'imported': synced_count, 'errors': error_count})}\n\n"
+                    buffer += _error_event(note, str(error), idx, total, synced_count, error_count)
+                elif synced_note:
+                    synced_count += 1
+                    # orjson encodes datetime natively, so a plain model_dump is enough
+                    note_dict = synced_note.model_dump()
+                    buffer += _note_event(note_dict, idx, total, synced_count, error_count)
+                else:
+                    error_count += 1
+                    buffer += _error_event(note, 'Failed to sync', idx, total, synced_count, error_count)
                 
-                # Send progress update
-                yield f"data: {json.dumps({'type': 'progress', 'current': idx, 'total': total, 'imported': synced_count, 'errors': error_count})}\n\n"
+                if len(buffer) >= _SSE_FLUSH_BYTES or idx % _SSE_FLUSH_NOTES == 0:
+                    yield bytes(buffer)
+                    buffer.clear()
+            
+            if buffer:
+                yield bytes(buffer)
             
             # Invalidate assistant cache since memory counts may have changed
             invalidate_assistant_cache()
+            invalidate_notes_cache()
             
             # Send completion
-            yield f"data: {json.dumps({'type': 'complete', 'total': total, 'imported': synced_count, 'errors': error_count, 'message': f'Import complete: {synced_count} imported, {error_count} errors'})}\n\n"
+            yield sse({'type': 'complete', 'total': total, 'imported': synced_count, 'errors': error_count, 'message': f'Import complete: {synced_count} imported, {error_count} errors'})
             
         except Exception as e:
-            yield f"data: {json.dumps({'type': 'error', 'error': str(e), 'message': f'Import failed: {str(e)}'})}\n\n"
+            yield sse({'type': 'error', 'error': str(e), 'message': f'Import failed: {str(e)}'})
     
-    return Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    # Runs when the server closes the response, even if the generator never started
+    response.call_on_close(client.close)
+    return response
 
 @api_bp.route("/sync/cache/invalidate", methods=["POST"])
 def invalidate_cache():
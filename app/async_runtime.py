@@ -0,0 +1,95 @@
+import asyncio
+import atexit
+import threading
+from typing import Any, AsyncIterator, Awaitable, Iterator
+
+try:
+    import uvloop
+    _new_event_loop = uvloop.new_event_loop
+except ImportError:
+    _new_event_loop = asyncio.new_event_loop
+
+# One event loop for the whole process, running on a daemon thread
+_loop = None
+_loop_thread = None
+_loop_lock = threading.Lock()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """Return the background event loop, starting it on first use"""
+    global _loop, _loop_thread
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = _new_event_loop()
+                _loop_thread = threading.Thread(target=loop.run_forever, name="async-runtime", daemon=True)
+                _loop_thread.start()
+                _loop = loop
+    return _loop
+
+
+@atexit.register
+def shutdown(timeout: float = 5.0):
+    """Stop the background loop and wait for its thread (a later run_coro starts a new one)"""
+    global _loop, _loop_thread
+    with _loop_lock:
+        loop, thread = _loop, _loop_thread
+        _loop = _loop_thread = None
+    if loop is None:
+        return
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(timeout)
+    if not thread.is_alive():
+        loop.close()
+
+
+def _running_on(loop: asyncio.AbstractEventLoop) -> bool:
+    """Whether the calling thread is the one running the given loop"""
+    try:
+        return asyncio.get_running_loop() is loop
+    except RuntimeError:
+        return False
+
+
+def run_coro(coro: Awaitable) -> Any:
+    """Run a coroutine on the background loop and block until it finishes
+
+    SDK clients bind their HTTP connections to the loop they first run on, so a
+    client used here should not also be driven by another event loop.
+    """
+    loop = get_loop()
+    if _running_on(loop):
+        # Blocking here would deadlock the loop; async code should await instead
+        coro.close()
+        raise RuntimeError("run_coro() called from the background loop itself")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+def run_all(coros, return_exceptions: bool = False) -> list:
+    """Run coroutines concurrently on the background loop, returning results in order
+
+    With return_exceptions, a failed coroutine's exception takes its place in the
+    results instead of being raised.
+    """
+    async def gather():
+        return await asyncio.gather(*coros, return_exceptions=return_exceptions)
+    return run_coro(gather())
+
+
+def iter_async(agen: AsyncIterator) -> Iterator:
+    """Iterate an async generator from sync code, one item per trip to the background loop
+
+    Closing the returned iterator early (e.g. a client disconnecting from a
+    streamed response) also closes the async generator.
+    """
+    async def next_item():
+        return await agen.__anext__()
+
+    try:
+        while True:
+            try:
+                yield run_coro(next_item())
+            except StopAsyncIteration:
+                return
+    finally:
+        run_coro(agen.aclose())
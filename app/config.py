@@ -1,5 +1,7 @@
 import os
+import tempfile
 from pathlib import Path
+import orjson
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -12,6 +14,45 @@ BASE_DIR = Path(__file__).parent.parent
 SETTINGS_FILE = BASE_DIR / "settings.json"
 
 
+def read_settings_file() -> dict:
+    """Read the settings file ({} when it is missing or not a JSON object)"""
+    try:
+        settings = orjson.loads(SETTINGS_FILE.read_bytes())
+    except (FileNotFoundError, orjson.JSONDecodeError):
+        return {}
+    return settings if isinstance(settings, dict) else {}
+
+
+def write_json_file(path: Path, data):
+    """Write JSON atomically (a crash never leaves a half-written file)"""
+    write_bytes_atomic(path, orjson.dumps(data, option=orjson.OPT_INDENT_2))
+
+
+def write_bytes_atomic(path: Path, payload):
+    """Write bytes through a temp file and os.replace, so readers see the old or new file whole
+    
+    payload is bytes, or an iterable of bytes written in order (so large files can be
+    streamed out without building them in memory first).
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.stem}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            if isinstance(payload, (bytes, bytearray)):
+                f.write(payload)
+            else:
+                f.writelines(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def write_settings_file(settings: dict):
+    """Write settings atomically (a crash never leaves a half-written file)"""
+    write_json_file(SETTINGS_FILE, settings)
+
+
 class Config:
     """Application configuration"""
     SECRET_KEY = os.environ.get("SECRET_KEY", "dev-secret-key-change-in-production")
@@ -1,4 +1,5 @@
 from .note import Note, NoteCreate, NoteUpdate
+from .note_internal import InternalNote
 from .settings import Settings, SettingsUpdate
 
-__all__ = ["Note", "NoteCreate", "NoteUpdate", "Settings", "SettingsUpdate"]
+__all__ = ["Note", "NoteCreate", "NoteUpdate", "InternalNote", "Settings", "SettingsUpdate"]
@@ -0,0 +1,29 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Tuple
+
+
+@dataclass(slots=True, frozen=True)
+class InternalNote:
+    """Note read from a trusted local source (Apple Notes or the notes cache)
+
+    Skips pydantic validation; the API layer still uses Note for request and
+    response bodies.
+    """
+    id: str
+    title: str
+    content: str
+    created_at: datetime
+    updated_at: datetime
+    categories: Tuple[str, ...] = ()
+
+    def to_json_dict(self) -> dict:
+        """Plain dict with ISO-8601 dates, for writing to JSON"""
+        return {
+            "id": self.id,
+            "title": self.title,
+            "content": self.content,
+            "created_at": self.created_at.isoformat(),
+            "updated_at": self.updated_at.isoformat(),
+            "categories": list(self.categories),
+        }
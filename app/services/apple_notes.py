@@ -1,10 +1,96 @@
 import subprocess
 import platform
-from datetime import datetime
-from typing import List, Optional
-from app.models.note import Note
+import threading
+import orjson
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+from app.models.note_internal import InternalNote
 from app.services.cache import NotesCache
 
+# JavaScript for Automation: dump every note with ISO-8601 dates, plus the note
+# count and latest modification time (epoch ms) the cache is keyed on
+_ALL_NOTES_JXA = """
+const notes = Application("Notes").notes;
+const ids = notes.id();
+const titles = notes.name();
+const bodies = notes.body();
+const created = notes.creationDate();
+const modified = notes.modificationDate();
+JSON.stringify({
+    count: ids.length,
+    maxMod: modified.reduce((latest, d) => Math.max(latest, d.getTime()), 0),
+    notes: ids.map((id, i) => ({
+        id: id,
+        title: titles[i],
+        content: bodies[i],
+        created_at: created[i].toISOString(),
+        updated_at: modified[i].toISOString()
+    }))
+});
+"""
+
+# Only the notes in [start, start + limit), read one by one, for imports limited
+# to the first or last N notes (%d = limit, %s = "true" to count from the end)
+_NOTES_RANGE_JXA = """
+const notes = Application("Notes").notes;
+const count = notes.length;
+const limit = Math.min(%d, count);
+const start = %s ? count - limit : 0;
+const records = [];
+for (let i = start; i < start + limit; i++) {
+    const note = notes[i];
+    records.push({
+        id: note.id(),
+        title: note.name(),
+        content: note.body(),
+        created_at: note.creationDate().toISOString(),
+        updated_at: note.modificationDate().toISOString()
+    });
+}
+JSON.stringify({count: count, notes: records});
+"""
+
+# Note count and latest modification time only, for validating the cache
+_LIBRARY_STATE_JXA = """
+const modified = Application("Notes").notes.modificationDate();
+JSON.stringify({
+    count: modified.length,
+    maxMod: modified.reduce((latest, d) => Math.max(latest, d.getTime()), 0)
+});
+"""
+
+def _parse_iso(date_str: str) -> datetime:
+    """Parse a JavaScript toISOString() value"""
+    return datetime.fromisoformat(date_str.replace("Z", "+00:00"))
+
+
+def _records_to_notes(records: list) -> List[InternalNote]:
+    """Build notes from the JXA JSON records"""
+    return [
+        InternalNote(
+            id=record["id"],
+            title=(record["title"] or "").strip() or "Untitled",
+            content=(record["content"] or "").strip(),
+            created_at=_parse_iso(record["created_at"]),
+            updated_at=_parse_iso(record["updated_at"]),
+        )
+        for record in records
+    ]
+
+
+def _limit_notes(notes: list, first_n: Optional[int] = None, last_n: Optional[int] = None) -> list:
+    """Keep only the first_n (or, failing that, the last_n) notes"""
+    if first_n is not None and first_n > 0:
+        return notes[:first_n]
+    if last_n is not None and last_n > 0:
+        return notes[-last_n:]
+    return notes
+
+
+def _from_epoch_ms(ms: int) -> Optional[datetime]:
+    """Convert a JXA getTime() value to a UTC datetime (0 means no notes)"""
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc) if ms else None
+
 class AppleNotesReader:
     """Service to read Apple Notes from macOS using AppleScript"""
     
@@ -13,12 +99,14 @@ class AppleNotesReader:
             raise RuntimeError("Apple Notes reader only works on macOS")
         self.use_cache = use_cache
         self.cache = NotesCache() if use_cache else None
+        # One reader is shared across requests, so only one cache write runs at a time
+        self._cache_lock = threading.Lock()
     
-    def _run_applescript(self, script: str) -> str:
-        """Execute AppleScript and return output"""
+    def _run_applescript(self, script: str, language: str = "AppleScript") -> str:
+        """Execute AppleScript (or JavaScript for Automation) and return output"""
         try:
             result = subprocess.run(
-                ["osascript", "-e", script],
+                ["osascript", "-l", language, "-e", script],
                 capture_output=True,
                 text=True,
                 check=True
@@ -27,179 +115,93 @@ class AppleNotesReader:
         except subprocess.CalledProcessError as e:
             raise RuntimeError(f"AppleScript execution failed: {e.stderr}")
     
-    def get_all_notes(self) -> List[Note]:
+    def get_all_notes(self) -> List[InternalNote]:
         """Retrieve all notes from Apple Notes"""
-        
-        
+        return self._fetch_notes()[0]
+    
+    def _fetch_notes(self) -> tuple:
+        """Read every note, returning (notes, note_count, last_modification)"""
         try:
-            # Use a record separator to handle multi-line content
-            script_lines = """
-            tell application "Notes"
-                set output to ""
-                set recordSep to "___NOTE_RECORD_SEP___"
-                repeat with aNote in notes
-                    try
-                        set noteId to id of aNote as string
-                        set noteTitle to name of aNote
-                        set noteContent to body of aNote
-                        set noteDate to creation date of aNote
-                        set noteModDate to modification date of aNote
-                        
-                        set output to output & noteId & "|||" & noteTitle & "|||" & noteContent & "|||" & (noteDate as string) & "|||" & (noteModDate as string) & recordSep
-                    end try
-                end repeat
-                return output
-            end tell
-            """
-            
-            result = self._run_applescript(script_lines)
-            
+            # JXA fetches each property for every note in a single Apple Event
+            # and returns one JSON document, so there is no string building in
+            # AppleScript and no separator parsing here
+            result = self._run_applescript(_ALL_NOTES_JXA, language="JavaScript")
             
             if not result:
-                
-                return []
-            
-            notes = []
-            # Split by record separator instead of newline
-            record_sep = "___NOTE_RECORD_SEP___"
-            note_records = result.split(record_sep)
-            
-            
-            for record in note_records:
-                if not record.strip():
-                    continue
-                
-                # Split by field separator - format: noteId|||title|||content|||date1|||date2
-                # Content may contain |||, so we need to handle that
-                parts = record.split("|||")
-                
-                if len(parts) >= 5:
-                    note_id = parts[0].strip()
-                    title = parts[1].strip() or "Untitled"
-                    # Content is everything between title and date1 (may contain |||)
-                    content = "|||".join(parts[2:-2]).strip()
-                    date1 = parts[-2].strip()
-                    date2 = parts[-1].strip()
-                    
-                    # Parse dates (AppleScript date format)
-                    try:
-                        created_at = self._parse_applescript_date(date1)
-                        updated_at = self._parse_applescript_date(date2)
-                    except:
-                        # Fallback to current time if parsing fails
-                        created_at = datetime.now()
-                        updated_at = datetime.now()
-                    
-                    notes.append(Note(
-                        id=note_id,
-                        title=title,
-                        content=content,
-                        created_at=created_at,
-                        updated_at=updated_at
-                    ))
-                # Skip records with invalid format
+                return [], 0, None
             
-            return notes
+            library = orjson.loads(result)
+            return _records_to_notes(library["notes"]), library["count"], _from_epoch_ms(library["maxMod"])
             
         except Exception as e:
             raise RuntimeError(f"Failed to read Apple Notes: {str(e)}")
     
-    def _parse_applescript_date(self, date_str: str) -> datetime:
-        """Parse AppleScript date string to Python datetime"""
-        # AppleScript dates are in format like "Monday, January 1, 2024 at 12:00:00 PM"
-        # Try to parse common formats
-        try:
-            # Try ISO format first
-            return datetime.fromisoformat(date_str.replace("Z", "+00:00"))
-        except:
-            pass
-        
-        # Try common date formats
-        formats = [
-            "%A, %B %d, %Y at %I:%M:%S %p",
-            "%B %d, %Y at %I:%M:%S %p",
-            "%Y-%m-%d %H:%M:%S",
-        ]
-        
-        for fmt in formats:
-            try:
-                return datetime.strptime(date_str, fmt)
-            except:
-                continue
+    def _fetch_notes_range(self, first_n: Optional[int] = None, last_n: Optional[int] = None) -> tuple:
+        """Read only the first_n or last_n notes, returning (notes, total note count)"""
+        if first_n is not None and first_n > 0:
+            script = _NOTES_RANGE_JXA % (first_n, "false")
+        else:
+            script = _NOTES_RANGE_JXA % (last_n, "true")
         
-        # Fallback to current time
-        return datetime.now()
+        try:
+            result = self._run_applescript(script, language="JavaScript")
+            if not result:
+                return [], 0
+            library = orjson.loads(result)
+            return _records_to_notes(library["notes"]), library["count"]
+        except Exception as e:
+            raise RuntimeError(f"Failed to read Apple Notes: {str(e)}")
     
-    def get_note_count(self) -> int:
-        """Get the total number of notes"""
+    def _get_library_state(self) -> tuple:
+        """Get (note_count, last_modification) with a single osascript call"""
         try:
-            script = """
-            tell application "Notes"
-                return count of notes
-            end tell
-            """
-            result = self._run_applescript(script)
-            return int(result) if result.isdigit() else 0
-        except:
-            return 0
+            state = orjson.loads(self._run_applescript(_LIBRARY_STATE_JXA, language="JavaScript"))
+            return state["count"], _from_epoch_ms(state["maxMod"])
+        except (RuntimeError, orjson.JSONDecodeError, KeyError, TypeError):
+            return 0, None
     
     def get_last_modification_time(self) -> Optional[datetime]:
         """Get the last modification time of any note (for cache invalidation)"""
-        try:
-            script = """
-            tell application "Notes"
-                set maxDate to date "January 1, 1900"
-                repeat with aNote in notes
-                    try
-                        set modDate to modification date of aNote
-                        if modDate > maxDate then
-                            set maxDate to modDate
-                        end if
-                    end try
-                end repeat
-                return maxDate as string
-            end tell
-            """
-            result = self._run_applescript(script)
-            if result:
-                return self._parse_applescript_date(result)
-            return None
-        except:
-            return None
+        return self._get_library_state()[1]
     
-    def get_all_notes_cached(self, force_refresh: bool = False) -> List[Note]:
+    def get_all_notes_cached(self, force_refresh: bool = False) -> List[InternalNote]:
         """Retrieve all notes from Apple Notes with caching support"""
+        return self.get_notes_cached(force_refresh=force_refresh)[0]
+    
+    def get_notes_cached(
+        self,
+        force_refresh: bool = False,
+        first_n: Optional[int] = None,
+        last_n: Optional[int] = None,
+    ) -> Tuple[List[InternalNote], int]:
+        """Retrieve notes with caching support, optionally only the first_n or last_n
         
-        
+        Returns (notes, total number of notes in Apple Notes). A limited read
+        that misses the cache asks Apple Notes for just those notes and leaves
+        the cache as it is.
+        """
         # Check cache first if enabled and not forcing refresh
         if self.use_cache and self.cache and not force_refresh:
             # Use fast cache validation that doesn't require AppleScript calls
             cached_notes = self.cache.get_cached_notes_fast()
-            if cached_notes is not None:
-                
-                return cached_notes
-            
-            # Fast cache validation failed, check if cache is still valid by comparing with current state
-            # This requires AppleScript calls, but only happens if fast validation fails
-            note_count = self.get_note_count()
-            last_modification = self.get_last_modification_time()
-            
+            if cached_notes is None:
+                # Fast cache validation failed, check if cache is still valid by comparing with current state
+                # This requires an osascript call, but only happens if fast validation fails
+                note_count, last_modification = self._get_library_state()
+                cached_notes = self.cache.get_cached_notes(note_count, last_modification)
             
-            cached_notes = self.cache.get_cached_notes(note_count, last_modification)
             if cached_notes is not None:
-                
-                return cached_notes
-        
-        
+                return _limit_notes(cached_notes, first_n, last_n), len(cached_notes)
+            
+            if (first_n is not None and first_n > 0) or (last_n is not None and last_n > 0):
+                return self._fetch_notes_range(first_n, last_n)
         
         # If cache miss or cache disabled, fetch from Apple Notes
-        notes = self.get_all_notes()
+        notes, note_count, last_modification = self._fetch_notes()
         
-        # Cache the results if caching is enabled
+        # Cache the results if caching is enabled (the fetch already reported the cache key inputs)
         if self.use_cache and self.cache:
-            note_count = len(notes)
-            last_modification = self.get_last_modification_time()
-            
-            self.cache.cache_notes(notes, note_count, last_modification)
+            with self._cache_lock:
+                self.cache.cache_notes(notes, note_count, last_modification)
         
-        return notes
\ No newline at end of file
+        return _limit_notes(notes, first_n, last_n), len(notes)
@@ -1,6 +1,18 @@
-from typing import List, Optional
+import asyncio
+import hashlib
+import inspect
+import logging
+import threading
+import orjson
+from cachetools import LRUCache, TTLCache
+from functools import lru_cache
+from operator import attrgetter
+from typing import Iterator, List, Optional, Union
 from datetime import datetime
 from app.models.note import Note, NoteCreate, NoteUpdate
+from app.models.note_internal import InternalNote
+from app.async_runtime import iter_async, run_all, run_coro
+from app.config import BASE_DIR, read_settings_file, write_json_file, write_settings_file
 from app.services.chunking import SemanticChunker
 
 try:
@@ -13,59 +25,461 @@ except ImportError:
     except ImportError:
         SDK_AVAILABLE = False
 
+logger = logging.getLogger(__name__)
+
+def _build_sdk_client_by_trial(api_key: str, base_url: str):
+    """Try the common SDK constructor call shapes in turn"""
+    try:
+        # Pattern 1: BackboardClient(api_key=..., base_url=...)
+        return SDKClient(api_key=api_key, base_url=base_url)
+    except TypeError:
+        try:
+            # Pattern 2: BackboardClient(api_key, base_url)
+            return SDKClient(api_key, base_url)
+        except TypeError:
+            # Pattern 3: Just api_key
+            return _build_sdk_client_without_base_url(api_key, base_url)
+
+
+def _build_sdk_client_without_base_url(api_key: str, base_url: str):
+    sdk_client = SDKClient(api_key)
+    if hasattr(sdk_client, 'set_base_url'):
+        sdk_client.set_base_url(base_url)
+    return sdk_client
+
+
+def _resolve_sdk_constructor():
+    """Pick the SDK constructor call shape from its signature, or None if it can't be read"""
+    try:
+        params = inspect.signature(SDKClient).parameters
+    except (TypeError, ValueError):
+        return None
+    
+    kinds = [param.kind for param in params.values()]
+    if inspect.Parameter.VAR_KEYWORD in kinds or ("api_key" in params and "base_url" in params):
+        return lambda api_key, base_url: SDKClient(api_key=api_key, base_url=base_url)
+    positional = [kind for kind in kinds if kind in (inspect.Parameter.POSITIONAL_ONLY, inspect.Parameter.POSITIONAL_OR_KEYWORD)]
+    if inspect.Parameter.VAR_POSITIONAL in kinds or len(positional) >= 2:
+        return lambda api_key, base_url: SDKClient(api_key, base_url)
+    if len(positional) == 1:
+        return _build_sdk_client_without_base_url
+    return None
+
+
+_build_sdk_client = (_resolve_sdk_constructor() if SDK_AVAILABLE else None) or _build_sdk_client_by_trial
+
+# SDK methods (and sub-client methods) that BackboardClient knows how to call
+_SDK_METHOD_NAMES = (
+    "add_memory", "get_memory", "get_memories", "get_memory_stats", "delete_memory",
+    "list_assistants", "create_assistant",
+    "create_note", "list_notes", "update_note", "delete_note",
+    "notes.create", "notes.list", "notes.update", "notes.delete",
+    "memory.create", "memory.list", "memory.update", "memory.delete",
+    "create_thread", "list_threads", "delete_thread", "get_thread",
+    "get_thread_messages", "list_messages", "add_message",
+    "threads.list", "threads.delete", "threads.get_messages",
+    "aclose",
+)
+_sdk_methods_by_type = {}
+
+# Default assistant resolved per account, shared by all clients in the process and
+# persisted so a fresh process can skip list_assistants
+DEFAULT_ASSISTANTS_FILE = BASE_DIR / ".cache" / "default_assistants.json"
+_default_assistant_ids = None
+_default_assistant_lock = threading.Lock()
+
+
+def _account_key(api_key: str, base_url: str) -> str:
+    """Key for an account's remembered assistant (the raw API key is not stored)"""
+    api_key_hash = hashlib.blake2b((api_key or "").encode(), digest_size=8).hexdigest()
+    return f"{api_key_hash}@{base_url}"
+
+
+def _load_default_assistant_ids() -> dict:
+    """The remembered default assistants, read from disk on first use (call with the lock held)"""
+    global _default_assistant_ids
+    if _default_assistant_ids is None:
+        try:
+            loaded = orjson.loads(DEFAULT_ASSISTANTS_FILE.read_bytes())
+        except (OSError, orjson.JSONDecodeError):
+            loaded = None
+        _default_assistant_ids = loaded if isinstance(loaded, dict) else {}
+    return _default_assistant_ids
+
+
+def _remembered_default_assistant(account: str) -> Optional[str]:
+    with _default_assistant_lock:
+        return _load_default_assistant_ids().get(account)
+
+
+def _set_default_assistant(account: str, assistant_id: Optional[str]):
+    """Remember (or, with None, forget) an account's default assistant"""
+    with _default_assistant_lock:
+        assistant_ids = _load_default_assistant_ids()
+        if assistant_ids.get(account) == assistant_id:
+            return
+        if assistant_id is None:
+            assistant_ids.pop(account, None)
+        else:
+            assistant_ids[account] = assistant_id
+        try:
+            write_json_file(DEFAULT_ASSISTANTS_FILE, assistant_ids)
+        except OSError as e:
+            # Still remembered for this process
+            logger.warning("Failed to save default assistant: %s", e)
+
+
+# Last content written per (account, assistant, note_id): (content digest, resulting Note,
+# memory ids). Lets update_note skip re-adding memories when a resync brings identical
+# content and the server confirms those memories still carry that digest.
+_synced_content = LRUCache(maxsize=4096)
+_synced_content_lock = threading.Lock()
+
+# Preview text per thread_id. A thread's first user message doesn't change once sent,
+# so list_threads only fetches previews for threads it hasn't seen recently.
+_thread_previews = TTLCache(maxsize=4096, ttl=3600)
+_thread_previews_lock = threading.Lock()
+
+
+def _content_digest(content: str, categories) -> bytes:
+    digest = hashlib.blake2b(content.encode(), digest_size=16)
+    if categories:
+        digest.update(orjson.dumps(list(categories)))
+    return digest.digest()
+
+
+def _result_memory_id(result) -> Optional[str]:
+    """Memory id from an add_memory result (dict or object)"""
+    if isinstance(result, dict):
+        return result.get('memory_id') or result.get('id')
+    return getattr(result, 'memory_id', None) or getattr(result, 'id', None)
+
+
+def _is_not_found(error: Exception) -> bool:
+    """Whether an SDK error is a 404"""
+    return getattr(error, "status_code", None) == 404 or type(error).__name__ == "BackboardNotFoundError"
+
+
+def _probe_sdk_methods(sdk_client) -> frozenset:
+    """Return which of _SDK_METHOD_NAMES the SDK client has (probed once per SDK class)"""
+    methods = _sdk_methods_by_type.get(type(sdk_client))
+    if methods is None:
+        found = set()
+        for name in _SDK_METHOD_NAMES:
+            target = sdk_client
+            for part in name.split("."):
+                target = getattr(target, part, None)
+                if target is None:
+                    break
+            else:
+                found.add(name)
+        methods = _sdk_methods_by_type[type(sdk_client)] = frozenset(found)
+    return methods
+
+
+# Call shapes as (positional names, keyword names), in the order they are tried
+_DELETE_MEMORY_SHAPES = (((), ("memory_id",)), (("assistant_id", "memory_id"), ()), ((), ("assistant_id", "memory_id")))
+_THREAD_ID_SHAPES = (((), ("thread_id",)), (("thread_id",), ()))
+_CREATE_THREAD_SHAPES = ((("assistant_id",), ()), ((), ("assistant_id",)))
+_LIST_THREADS_SHAPES = (((), ("assistant_id",)), ((), ()))
+
+# SDK methods that can return a thread's messages, in order of preference
+_MESSAGE_SOURCES = ("get_thread_messages", "threads.get_messages", "list_messages", "get_thread")
+
+# Winning call shape per (SDK class, method, candidate shapes)
+_call_shapes_by_method = {}
+
+
+def _sdk_attr(sdk_client, name: str):
+    """Resolve a dotted SDK method name such as threads.delete"""
+    target = sdk_client
+    for part in name.split("."):
+        target = getattr(target, part)
+    return target
+
+
+def _resolve_call_shape(method, shapes: tuple):
+    """The first shape the method's signature accepts, or None if it can't be read"""
+    try:
+        signature = inspect.signature(method)
+    except (TypeError, ValueError):
+        return None
+    # A *args/**kwargs wrapper accepts every shape, so its signature says nothing
+    if any(param.kind in (inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD)
+           for param in signature.parameters.values()):
+        return None
+    for positional, keywords in shapes:
+        try:
+            signature.bind(*positional, **dict.fromkeys(keywords))
+        except TypeError:
+            continue
+        return positional, keywords
+    return None
+
+
+# List attribute getter per (response type, candidate attributes); None when the type has none
+_list_getters_by_type = {}
+
+
+def _unwrap_list(response, attrs: tuple = ("memories", "data", "items")):
+    """Pull the item list out of an SDK list response (e.g. MemoriesListResponse.memories)"""
+    key = (type(response), attrs)
+    try:
+        getter = _list_getters_by_type[key]
+    except KeyError:
+        getter = next((attrgetter(attr) for attr in attrs if hasattr(response, attr)), None)
+        _list_getters_by_type[key] = getter
+    if getter is not None:
+        return getter(response)
+    if isinstance(response, tuple) and len(response) > 0:
+        return response[0]
+    return response
+
+
+# Thread fields that hold preview text directly, and message fields that hold its text
+_PREVIEW_DIRECT = ("preview", "preview_text")
+_PREVIEW_MSG_FIELDS = ("content", "text", "message", "body")
+_PREVIEW_MAX_CHARS = 100
+# Where message lists sit in a messages response, and the (lowercased) role previews come from
+_MESSAGE_LIST_ATTRS = ("messages", "data", "items")
+_USER_ROLE = "user"
+# Threads opened by the note tagger start with this prompt and are hidden from the thread list
+_TAGGING_PROMPT_START = "Analyze this note and suggest 3-5 relevant category tags"
+
+
+def _preview_text(value) -> str:
+    """Stripped text for a thread preview, cut to _PREVIEW_MAX_CHARS with '...'"""
+    text = value if isinstance(value, str) else str(value)
+    # Most previews have no edge whitespace; test the ends before stripping
+    if text and (text[0].isspace() or text[-1].isspace()):
+        text = text.strip()
+    if len(text) > _PREVIEW_MAX_CHARS:
+        text = text[:_PREVIEW_MAX_CHARS] + '...'
+    return text
+
+
+def _first(obj, keys: tuple):
+    """The first truthy field among keys of a dict, or attribute of an object; '' if none"""
+    if isinstance(obj, dict):
+        get = obj.get
+    else:
+        def get(key):
+            return getattr(obj, key, None)
+    for key in keys:
+        value = get(key)
+        if value:
+            return value
+    return ''
+
+
+def _pick(d: dict, *keys):
+    """The first truthy value among d's keys, or ''"""
+    return _first(d, keys)
+
+
+def _thread_field(thread_dict: dict, thread, name: str):
+    """A thread field from its dict, falling back to attributes (properties, slots) on the object"""
+    if name in thread_dict:
+        return thread_dict[name]
+    if thread is not thread_dict:
+        return getattr(thread, name, None)
+    return None
+
+
+def _extract_preview(thread_dict: dict, thread=None):
+    """Preview text for a thread from its own fields, or None if it carries none"""
+    for field in _PREVIEW_DIRECT:
+        value = _thread_field(thread_dict, thread, field)
+        if value:
+            return str(value)
+    
+    for field in ("first_message", "last_message"):
+        msg = _thread_field(thread_dict, thread, field)
+        if isinstance(msg, dict):
+            msg = _first(msg, _PREVIEW_MSG_FIELDS)
+        if msg and isinstance(msg, str):
+            return msg
+    
+    # Otherwise use the first user message, if the thread embeds its messages
+    messages = _thread_field(thread_dict, thread, "messages")
+    if isinstance(messages, list):
+        for msg in messages:
+            role_content = _message_role_content(msg)
+            if role_content is not None and role_content[0] == _USER_ROLE:
+                return role_content[1]
+    return None
+
+
+# How _sdk_result_to_note_many reads fields from each SDK result type
+_FIELDS_FROM_DICT = "dict"
+_FIELDS_FROM_OBJECT = "object"
+_FIELDS_UNSUPPORTED = "unsupported"
+_field_sources_by_type = {}
+
+
+def _unwrap_messages(messages):
+    """Pull the message list out of a messages response (e.g. a .messages wrapper)"""
+    return _unwrap_list(messages, _MESSAGE_LIST_ATTRS)
+
+
+def _message_role_content(msg):
+    """(lowercased role, content) of a message dict or SDK object, or None if it is neither"""
+    if isinstance(msg, dict):
+        role = msg.get('role', '')
+    elif hasattr(msg, '__dict__') or hasattr(msg, '__slots__'):
+        # Attribute reads also cover slotted objects and properties
+        role = getattr(msg, 'role', '')
+    else:
+        return None
+    return (role or '').lower(), _first(msg, _PREVIEW_MSG_FIELDS)
+
+
+def _extract_dict_chunk(chunk) -> tuple:
+    chunk_type = chunk.get('type')
+    return chunk_type, (chunk.get('content', '') or '') if chunk_type == 'content_streaming' else ''
+
+
+def _extract_typed_chunk(chunk) -> tuple:
+    chunk_type = chunk.type
+    return chunk_type, (getattr(chunk, 'content', '') or '') if chunk_type == 'content_streaming' else ''
+
+
+def _extract_content_chunk(chunk) -> tuple:
+    return None, chunk.content or ''
+
+
+def _extract_str_chunk(chunk) -> tuple:
+    return None, chunk
+
+
+def _extract_unknown_chunk(chunk) -> tuple:
+    return None, ''
+
+
+# Extractor per streamed chunk class; the shape of an SDK's chunks doesn't change within a class
+_chunk_extractors_by_type = {}
+
+
+def _chunk_extractor(chunk):
+    """The (type, text) extractor for chunks shaped like this one; memory_retrieved and other events carry no text"""
+    extract = _chunk_extractors_by_type.get(type(chunk))
+    if extract is None:
+        if isinstance(chunk, dict):
+            extract = _extract_dict_chunk
+        elif hasattr(chunk, 'type'):
+            extract = _extract_typed_chunk
+        elif hasattr(chunk, 'content'):
+            extract = _extract_content_chunk
+        elif isinstance(chunk, str):
+            extract = _extract_str_chunk
+        else:
+            extract = _extract_unknown_chunk
+        _chunk_extractors_by_type[type(chunk)] = extract
+    return extract
+
+
+@lru_cache(maxsize=1024)
+def _parse_iso_datetime(dt_str: str) -> Optional[datetime]:
+    """Parse an ISO-8601 string from the API, or return None (list responses repeat timestamps)"""
+    # fromisoformat only accepts a trailing Z from Python 3.11
+    if dt_str.endswith("Z"):
+        dt_str = dt_str[:-1] + "+00:00"
+    try:
+        return datetime.fromisoformat(dt_str)
+    except ValueError:
+        return None
+
+
+async def _fetch_no_messages(thread_id):
+    """Messages fetcher for SDKs with no message source"""
+    return None
+
+
+def _split_title_body(content: str) -> tuple:
+    """(title, body) of note content whose first line is the title
+    
+    The title is the stripped first line, cut to 100 chars ("Untitled", with the
+    content left whole, when that line is blank); the body is what follows,
+    minus leading blank lines.
+    """
+    newline = content.find("\n")
+    first_line = (content if newline < 0 else content[:newline]).strip()
+    if not first_line:
+        return "Untitled", content
+    if newline < 0:
+        return first_line[:100], ""
+    
+    # Walk past blank lines by index so the body is sliced out only once
+    start = newline + 1
+    end = len(content)
+    while start < end:
+        newline = content.find("\n", start)
+        line_end = end if newline < 0 else newline
+        if line_end > start and not content[start:line_end].isspace():
+            break
+        start = line_end + 1
+    return first_line[:100], content[start:]
+
+
+def _shaped_call(method, positional: tuple, keywords: tuple, values: dict):
+    """Call method with values laid out as the shape says (callable values are evaluated first)"""
+    resolved = {n: (values[n]() if callable(values[n]) else values[n]) for n in positional + keywords}
+    return method(*[resolved[n] for n in positional], **{n: resolved[n] for n in keywords})
+
+
+async def _gather_limited(awaitables: list, max_concurrency: int) -> list:
+    """gather with at most max_concurrency in flight; a failure's exception takes its place"""
+    limit = asyncio.Semaphore(max_concurrency)
+    
+    async def run(awaitable):
+        async with limit:
+            return await awaitable
+    
+    return await asyncio.gather(*(run(awaitable) for awaitable in awaitables), return_exceptions=True)
+
+
 class BackboardClient:
     """Client for interacting with Backboard.io API using backboard-sdk"""
     
+    __slots__ = (
+        "sdk_client", "_sdk_methods", "api_key", "base_url",
+        "_default_assistant_id", "_default_assistant_remembered",
+        "_default_thread_id", "_current_assistant_id", "chunker",
+        "_messages_fetcher",
+    )
+    
     def __init__(self, api_key: str, base_url: str = "https://app.backboard.io/api", assistant_id: Optional[str] = None):
         if not SDK_AVAILABLE:
             raise RuntimeError("backboard-sdk is not installed. Please install it with: pip install backboard-sdk")
         
-        # Initialize SDK client
-        # Try common initialization patterns
+        # Initialize SDK client (call shape resolved once at import)
         try:
-            # Pattern 1: BackboardClient(api_key=..., base_url=...)
-            self.sdk_client = SDKClient(api_key=api_key, base_url=base_url)
-            
-        except TypeError:
-            try:
-                # Pattern 2: BackboardClient(api_key, base_url)
-                self.sdk_client = SDKClient(api_key, base_url)
-                
-            except TypeError:
-                try:
-                    # Pattern 3: Just api_key
-                    self.sdk_client = SDKClient(api_key)
-                    if hasattr(self.sdk_client, 'set_base_url'):
-                        self.sdk_client.set_base_url(base_url)
-                    
-                except Exception as e:
-                    
-                    raise RuntimeError(f"Failed to initialize backboard-sdk: {str(e)}")
-        
-        # Check SDK client methods
-        has_create_note = hasattr(self.sdk_client, 'create_note')
-        has_notes_create = hasattr(self.sdk_client, 'notes') and hasattr(self.sdk_client.notes, 'create') if hasattr(self.sdk_client, 'notes') else False
-        has_memory_create = hasattr(self.sdk_client, 'memory') and hasattr(self.sdk_client.memory, 'create') if hasattr(self.sdk_client, 'memory') else False
+            self.sdk_client = _build_sdk_client(api_key, base_url)
+        except Exception as e:
+            raise RuntimeError(f"Failed to initialize backboard-sdk: {str(e)}")
         
+        # Check SDK client methods (probed once per SDK class)
+        self._sdk_methods = _probe_sdk_methods(self.sdk_client)
         
         self.api_key = api_key
         self.base_url = base_url
         self._default_assistant_id = assistant_id  # Use provided assistant_id or None
+        self._default_assistant_remembered = False  # Whether it came from _default_assistant_ids
         self._default_thread_id = None  # Cache thread_id for chat sessions
         self._current_assistant_id = None  # Track current assistant for thread management
         self.chunker = SemanticChunker(max_chunk_size=3800)
+        self._messages_fetcher = None  # Resolved on first use by _resolve_messages_fetcher
+    
+    def close(self):
+        """Close the SDK client's HTTP connections (the client can't be used afterwards)"""
+        if 'aclose' in self._sdk_methods:
+            run_coro(self.sdk_client.aclose())
     
     def _add_app_assistant_id(self, assistant_id: str):
         """Add an assistant ID to the app_assistant_ids list in settings"""
         try:
-            from app.config import SETTINGS_FILE
-            import json
-            
             # Load existing settings
-            current_settings = {}
-            if SETTINGS_FILE.exists():
-                with open(SETTINGS_FILE, "r") as f:
-                    current_settings = json.load(f)
+            current_settings = read_settings_file()
             
             # Get current list
             app_assistant_ids = current_settings.get("app_assistant_ids", [])
@@ -79,26 +493,14 @@ class BackboardClient:
                 current_settings["app_assistant_ids"] = app_assistant_ids
                 
                 # Save to file
-                SETTINGS_FILE.parent.mkdir(parents=True, exist_ok=True)
-                with open(SETTINGS_FILE, "w") as f:
-                    json.dump(current_settings, f, indent=2)
+                write_settings_file(current_settings)
         except Exception:
             # Silently fail - this is not critical
             pass
     
     def _get_app_assistant_ids(self) -> list:
         """Get list of assistant IDs created by this app"""
-        try:
-            from app.config import SETTINGS_FILE
-            import json
-            
-            if SETTINGS_FILE.exists():
-                with open(SETTINGS_FILE, "r") as f:
-                    settings_data = json.load(f)
-                    return settings_data.get("app_assistant_ids", [])
-        except Exception:
-            pass
-        return []
+        return read_settings_file().get("app_assistant_ids", [])
     
     def _get_or_create_default_assistant(self) -> str:
         """Get or create a default assistant for storing notes"""
@@ -106,24 +508,22 @@ class BackboardClient:
         if self._default_assistant_id:
             return self._default_assistant_id
         
+        # Reuse the assistant resolved earlier for the same account (in this or a past process)
+        account = _account_key(self.api_key, self.base_url)
+        known_assistant_id = _remembered_default_assistant(account)
+        if known_assistant_id:
+            self._default_assistant_id = known_assistant_id
+            self._default_assistant_remembered = True
+            return known_assistant_id
+        
         # Try to list existing assistants and find one named "Notes" or create one
-        # SDK methods are async, so we need to use asyncio to run them
-        # Use a new event loop each time to avoid "Event loop is closed" errors
-        import asyncio
+        # SDK methods are async, so they run on the shared background loop
         
         try:
-            if hasattr(self.sdk_client, 'list_assistants'):
+            if 'list_assistants' in self._sdk_methods:
                 
-                # Run async coroutine synchronously - create new event loop
-                try:
-                    loop = asyncio.get_event_loop()
-                    if loop.is_closed():
-                        loop = asyncio.new_event_loop()
-                        asyncio.set_event_loop(loop)
-                except RuntimeError:
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                assistants = loop.run_until_complete(self.sdk_client.list_assistants())
+                # Run async coroutine synchronously on the shared loop
+                assistants = run_coro(self.sdk_client.list_assistants())
                 
                 
                 # Look for an assistant named "Notes"
@@ -139,6 +539,7 @@ class BackboardClient:
                             if assistant_id:
                                 assistant_id_str = str(assistant_id)
                                 self._default_assistant_id = assistant_id_str
+                                _set_default_assistant(account, assistant_id_str)
                                 # Add to app_assistant_ids if not already present
                                 self._add_app_assistant_id(assistant_id_str)
                                 return self._default_assistant_id
@@ -147,23 +548,16 @@ class BackboardClient:
         
         # Create a new assistant named "Notes"
         try:
-            if hasattr(self.sdk_client, 'create_assistant'):
-                # Run async coroutine synchronously - reuse or create event loop
-                try:
-                    loop = asyncio.get_event_loop()
-                    if loop.is_closed():
-                        loop = asyncio.new_event_loop()
-                        asyncio.set_event_loop(loop)
-                except RuntimeError:
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                assistant = loop.run_until_complete(self.sdk_client.create_assistant(name="Notes"))
+            if 'create_assistant' in self._sdk_methods:
+                # Run async coroutine synchronously on the shared loop
+                assistant = run_coro(self.sdk_client.create_assistant(name="Notes"))
                 assistant_dict = assistant if isinstance(assistant, dict) else assistant.__dict__ if hasattr(assistant, '__dict__') else {}
                 # The key is "assistant_id" not "id"!
                 assistant_id = assistant_dict.get('assistant_id', '') if isinstance(assistant_dict, dict) else getattr(assistant, 'assistant_id', '')
                 if assistant_id:
                     assistant_id_str = str(assistant_id)
                     self._default_assistant_id = assistant_id_str
+                    _set_default_assistant(account, assistant_id_str)
                     # Add to app_assistant_ids
                     self._add_app_assistant_id(assistant_id_str)
                     return self._default_assistant_id
@@ -172,80 +566,71 @@ class BackboardClient:
         
         raise RuntimeError("Could not get or create default assistant")
     
+    def _call_sdk(self, name: str, shapes: tuple, **values):
+        """Call an SDK method with the first argument shape it accepts, remembering the winner
+        
+        The shape comes from the method's signature when it can be read; otherwise
+        shapes are tried in turn until one doesn't raise TypeError. Callable values
+        are only evaluated when the chosen shape needs them.
+        """
+        method = _sdk_attr(self.sdk_client, name)
+        shape = self._sdk_call_shape(name, shapes)
+        
+        def call(positional, keywords):
+            return run_coro(_shaped_call(method, positional, keywords, values))
+        
+        if shape is not None:
+            return call(*shape)
+        
+        for i, candidate in enumerate(shapes):
+            try:
+                result = call(*candidate)
+            except TypeError:
+                if i == len(shapes) - 1:
+                    raise
+                continue
+            _call_shapes_by_method[(type(self.sdk_client), name, shapes)] = candidate
+            return result
+    
+    def _sdk_call_shape(self, name: str, shapes: tuple):
+        """The remembered or signature-resolved call shape for an SDK method (None if unknown)"""
+        key = (type(self.sdk_client), name, shapes)
+        shape = _call_shapes_by_method.get(key)
+        if shape is None:
+            shape = _resolve_call_shape(_sdk_attr(self.sdk_client, name), shapes)
+            if shape is not None:
+                _call_shapes_by_method[key] = shape
+        return shape
+    
+    def has_sdk_method(self, name: str) -> bool:
+        """Whether the SDK client has a method (dotted names for sub-clients, e.g. "notes.create")"""
+        return name in self._sdk_methods
+    
+    def _forget_stale_default_assistant(self, error: Exception):
+        """Drop a remembered default assistant that the API no longer knows"""
+        if self._default_assistant_remembered and _is_not_found(error):
+            _set_default_assistant(_account_key(self.api_key, self.base_url), None)
+            self._default_assistant_id = None
+            self._default_assistant_remembered = False
+    
     def create_note(self, note: NoteCreate) -> Note:
         """Create a new note in Backboard.io"""
         
         
         try:
-            # Check available methods
-            has_create_note = hasattr(self.sdk_client, 'create_note')
-            has_notes = hasattr(self.sdk_client, 'notes')
-            has_notes_create = has_notes and hasattr(self.sdk_client.notes, 'create') if has_notes else False
-            has_memory = hasattr(self.sdk_client, 'memory')
-            has_memory_create = has_memory and hasattr(self.sdk_client.memory, 'create') if has_memory else False
-            
-            
             # Try common SDK method patterns - SDK uses add_memory for creating memories
-            has_add_memory = hasattr(self.sdk_client, 'add_memory')
-            
-            
-            if has_add_memory:
+            if 'add_memory' in self._sdk_methods:
                 # Get or create default assistant
                 assistant_id = self._get_or_create_default_assistant()
+                return run_coro(self._create_note_async(note, assistant_id))
                 
-                # Combine title and content
-                combined_content = f"{note.title}\n\n{note.content}" if note.title else note.content
-                
-                # Use semantic chunking to split large content
-                chunks = self.chunker.chunk_text(combined_content, title=note.title)
-                
-                # Prepare metadata with categories if provided
-                metadata = None
-                if note.categories:
-                    metadata = {"categories": note.categories}
-                
-                # Call add_memory with assistant_id and content (signature: add_memory(assistant_id, content, metadata=None))
-                # SDK methods are async, so we need to use asyncio to run them
-                import asyncio
-                try:
-                    loop = asyncio.get_event_loop()
-                    if loop.is_closed():
-                        loop = asyncio.new_event_loop()
-                        asyncio.set_event_loop(loop)
-                except RuntimeError:
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                
-                # Create memories for all chunks
-                results = []
-                for chunk in chunks:
-                    # Try passing metadata as third parameter
-                    try:
-                        if metadata:
-                            memory_result = loop.run_until_complete(
-                                self.sdk_client.add_memory(assistant_id, chunk.content, metadata=metadata)
-                            )
-                        else:
-                            memory_result = loop.run_until_complete(
-                                self.sdk_client.add_memory(assistant_id, chunk.content)
-                            )
-                    except TypeError:
-                        # If metadata parameter doesn't work, try without it
-                        memory_result = loop.run_until_complete(
-                            self.sdk_client.add_memory(assistant_id, chunk.content)
-                        )
-                    results.append(memory_result)
-                
-                # Return the first chunk as the primary note
-                result = results[0] if results else None
-                
-            elif has_create_note:
+            elif 'create_note' in self._sdk_methods:
                 
                 result = self.sdk_client.create_note(title=note.title, content=note.content)
-            elif has_notes_create:
+            elif 'notes.create' in self._sdk_methods:
                 
                 result = self.sdk_client.notes.create(title=note.title, content=note.content)
-            elif has_memory_create:
+            elif 'memory.create' in self._sdk_methods:
                 
                 result = self.sdk_client.memory.create(title=note.title, content=note.content)
             else:
@@ -257,9 +642,73 @@ class BackboardClient:
             # Convert SDK result to our Note model
             return self._sdk_result_to_note(result)
         except Exception as e:
-            
+            self._forget_stale_default_assistant(e)
             raise RuntimeError(f"Failed to create note: {str(e)}")
     
+    def create_notes(self, notes: List[NoteCreate], max_concurrency: int = 16) -> list:
+        """Create several notes concurrently on this client
+        
+        Returns one entry per note, in order: the created Note, or the
+        RuntimeError that failed it.
+        """
+        if 'add_memory' not in self._sdk_methods:
+            # No awaitable path; create one at a time
+            results = []
+            for note in notes:
+                try:
+                    results.append(self.create_note(note))
+                except RuntimeError as e:
+                    results.append(e)
+            return results
+        
+        assistant_id = self._get_or_create_default_assistant()
+        outcomes = run_coro(_gather_limited([self._create_note_async(note, assistant_id) for note in notes], max_concurrency))
+        results = []
+        for outcome in outcomes:
+            if isinstance(outcome, Exception):
+                self._forget_stale_default_assistant(outcome)
+                outcome = RuntimeError(f"Failed to create note: {str(outcome)}")
+            results.append(outcome)
+        return results
+    
+    async def _create_note_async(self, note: NoteCreate, assistant_id: str) -> Note:
+        """add_memory path of create_note (awaitable, for batching)"""
+        # Combine title and content
+        combined_content = f"{note.title}\n\n{note.content}" if note.title else note.content
+        
+        # Use semantic chunking to split large content
+        chunks = self._chunk_content(combined_content, note.title)
+        
+        # Prepare metadata with categories if provided
+        metadata = None
+        if note.categories:
+            metadata = {"categories": note.categories}
+        
+        # Create memories for all chunks concurrently
+        results = await self._add_memories(assistant_id, chunks, metadata)
+        
+        # Return the first chunk as the primary note
+        return self._sdk_result_to_note(results[0] if results else None)
+    
+    def _chunk_content(self, content: str, title: str = "") -> list:
+        """Chunk note content for add_memory (the chunker passes short notes through whole)"""
+        return self.chunker.chunk_text(content, title=title)
+    
+    async def _add_memories(self, assistant_id: str, chunks: list, metadata: Optional[dict] = None) -> list:
+        """Add one memory per chunk in a single gather (results keep chunk order)"""
+        # Try passing metadata as third parameter
+        try:
+            if metadata:
+                pending = [self.sdk_client.add_memory(assistant_id, chunk.content, metadata=metadata) for chunk in chunks]
+            else:
+                pending = [self.sdk_client.add_memory(assistant_id, chunk.content) for chunk in chunks]
+        except TypeError:
+            # If metadata parameter doesn't work, try without it
+            pending = [self.sdk_client.add_memory(assistant_id, chunk.content) for chunk in chunks]
+        
+        # gather already returns a list sized to the chunks, in chunk order
+        return await asyncio.gather(*pending)
+    
     def get_note(self, note_id: str) -> Optional[Note]:
         """Get a note by ID"""
         try:
@@ -277,62 +726,34 @@ class BackboardClient:
             return None
     
     def list_notes(self) -> List[Note]:
-        """List all notes"""
+        """List all notes (raises RuntimeError when they can't be fetched)"""
         try:
             
             
             # SDK uses get_memories for listing memories (requires assistant_id)
             assistant_id = self._get_or_create_default_assistant()
-            if hasattr(self.sdk_client, 'get_memories'):
-                # SDK methods are async
-                import asyncio
-                try:
-                    loop = asyncio.get_event_loop()
-                    if loop.is_closed():
-                        loop = asyncio.new_event_loop()
-                        asyncio.set_event_loop(loop)
-                except RuntimeError:
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                results = loop.run_until_complete(self.sdk_client.get_memories(assistant_id))
+            if 'get_memories' in self._sdk_methods:
+                results = run_coro(self.sdk_client.get_memories(assistant_id))
                 
                 # get_memories returns MemoriesListResponse object - need to extract the actual memories list
-                # Check common attributes: memories, data, items, results
-                if hasattr(results, 'memories'):
-                    results = results.memories
-                    
-                elif hasattr(results, 'data'):
-                    results = results.data
-                    
-                elif hasattr(results, 'items'):
-                    results = results.items
+                results = _unwrap_list(results)
                     
-                elif isinstance(results, tuple) and len(results) > 0:
-                    # Extract the actual list of memories from the tuple
-                    results = results[0]
-                    
-            elif hasattr(self.sdk_client, 'list_notes'):
+            elif 'list_notes' in self._sdk_methods:
                 results = self.sdk_client.list_notes()
-            elif hasattr(self.sdk_client, 'notes') and hasattr(self.sdk_client.notes, 'list'):
+            elif 'notes.list' in self._sdk_methods:
                 results = self.sdk_client.notes.list()
-            elif hasattr(self.sdk_client, 'memory') and hasattr(self.sdk_client.memory, 'list'):
+            elif 'memory.list' in self._sdk_methods:
                 results = self.sdk_client.memory.list()
             else:
                 return []
             
-            notes = []
-            if results:
-                for item in results:
-                    
-                    note = self._sdk_result_to_note(item)
-                    notes.append(note)
-            
-            
-            
-            return notes
+            if not results:
+                return []
+            return self._sdk_result_to_note_many(results)
         except Exception as e:
-            
-            return []
+            self._forget_stale_default_assistant(e)
+            # Raise rather than return [], which callers would cache as an empty note set
+            raise RuntimeError(f"Failed to list notes: {str(e)}")
     
     def update_note(self, note_id: str, note_update: NoteUpdate) -> Optional[Note]:
         """Update an existing note"""
@@ -353,61 +774,15 @@ class BackboardClient:
             # SDK uses update_memory for updating memories
             # Note: note_id from Apple Notes won't match memory_id in Backboard
             # Since we can't match IDs, treat update as create
-            if hasattr(self.sdk_client, 'add_memory'):
-                
-                # Combine title and content into a single content string
-                content = data.get('content', '')
-                title = data.get('title', '')
-                combined_content = f"{title}\n\n{content}" if title else content
+            if 'add_memory' in self._sdk_methods:
                 assistant_id = self._get_or_create_default_assistant()
+                return run_coro(self._update_note_async(note_id, data, assistant_id))
                 
-                # Use semantic chunking to split large content
-                chunks = self.chunker.chunk_text(combined_content, title=title)
-                
-                # Prepare metadata with categories if provided
-                metadata = None
-                if data.get("categories"):
-                    metadata = {"categories": data["categories"]}
-                
-                # SDK methods are async
-                import asyncio
-                try:
-                    loop = asyncio.get_event_loop()
-                    if loop.is_closed():
-                        loop = asyncio.new_event_loop()
-                        asyncio.set_event_loop(loop)
-                except RuntimeError:
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                
-                # Create memories for all chunks
-                results = []
-                for chunk in chunks:
-                    # Try passing metadata as third parameter
-                    try:
-                        if metadata:
-                            memory_result = loop.run_until_complete(
-                                self.sdk_client.add_memory(assistant_id, chunk.content, metadata=metadata)
-                            )
-                        else:
-                            memory_result = loop.run_until_complete(
-                                self.sdk_client.add_memory(assistant_id, chunk.content)
-                            )
-                    except TypeError:
-                        # If metadata parameter doesn't work, try without it
-                        memory_result = loop.run_until_complete(
-                            self.sdk_client.add_memory(assistant_id, chunk.content)
-                        )
-                    results.append(memory_result)
-                
-                # Return the first chunk as the primary note
-                result = results[0] if results else None
-                
-            elif hasattr(self.sdk_client, 'update_note'):
+            elif 'update_note' in self._sdk_methods:
                 result = self.sdk_client.update_note(note_id, **data)
-            elif hasattr(self.sdk_client, 'notes') and hasattr(self.sdk_client.notes, 'update'):
+            elif 'notes.update' in self._sdk_methods:
                 result = self.sdk_client.notes.update(note_id, **data)
-            elif hasattr(self.sdk_client, 'memory') and hasattr(self.sdk_client.memory, 'update'):
+            elif 'memory.update' in self._sdk_methods:
                 result = self.sdk_client.memory.update(note_id, **data)
             else:
                 return None
@@ -417,115 +792,177 @@ class BackboardClient:
             
             return None
     
+    async def _update_note_async(self, note_id: str, data: dict, assistant_id: str) -> Note:
+        """add_memory path of update_note (awaitable, for batching)"""
+        # Combine title and content into a single content string
+        content = data.get('content', '')
+        title = data.get('title', '')
+        combined_content = f"{title}\n\n{content}" if title else content
+        
+        # Nothing changed since this note was last written here: skip the add_memory calls
+        synced_key = (_account_key(self.api_key, self.base_url), assistant_id, note_id)
+        content_digest = _content_digest(combined_content, data.get("categories"))
+        with _synced_content_lock:
+            synced = _synced_content.get(synced_key)
+        if synced is not None and synced[0] == content_digest:
+            if await self._memories_match(assistant_id, synced[2], content_digest.hex()):
+                return synced[1].model_copy()
+            with _synced_content_lock:
+                _synced_content.pop(synced_key, None)
+        
+        # Use semantic chunking to split large content
+        chunks = self._chunk_content(combined_content, title)
+        
+        # Prepare metadata with the content digest (checked on resync) and categories if provided
+        metadata = {"content_digest": content_digest.hex()}
+        if data.get("categories"):
+            metadata["categories"] = data["categories"]
+        
+        # Create memories for all chunks concurrently
+        results = await self._add_memories(assistant_id, chunks, metadata)
+        
+        # Return the first chunk as the primary note
+        note = self._sdk_result_to_note(results[0] if results else None)
+        memory_ids = tuple(_result_memory_id(result) for result in results)
+        if memory_ids and all(memory_ids):
+            with _synced_content_lock:
+                _synced_content[synced_key] = (content_digest, note, memory_ids)
+        return note.model_copy()
+    
+    async def _memories_match(self, assistant_id: str, memory_ids: tuple, digest: str) -> bool:
+        """Whether every memory still exists on the server and carries this content digest"""
+        if 'get_memory' not in self._sdk_methods:
+            return False
+        try:
+            memories = await asyncio.gather(
+                *(self.sdk_client.get_memory(assistant_id, memory_id) for memory_id in memory_ids))
+        except Exception as e:
+            # Deleted elsewhere (not found) or unreachable: write the note again
+            if not _is_not_found(e):
+                logger.warning("Failed to confirm synced memories: %s", e)
+            return False
+        for memory in memories:
+            metadata = memory.get('metadata') if isinstance(memory, dict) else getattr(memory, 'metadata', None)
+            if not isinstance(metadata, dict) or metadata.get('content_digest') != digest:
+                return False
+        return True
+    
     def delete_note(self, note_id: str) -> bool:
         """Delete a note"""
         try:
             # SDK uses delete_memory for deleting memories (async method, requires memory_id parameter)
-            if hasattr(self.sdk_client, 'delete_memory'):
-                # SDK methods are async, so we need to use asyncio to run them
-                import asyncio
-                try:
-                    loop = asyncio.get_event_loop()
-                    if loop.is_closed():
-                        loop = asyncio.new_event_loop()
-                        asyncio.set_event_loop(loop)
-                except RuntimeError:
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
+            if 'delete_memory' in self._sdk_methods:
                 
-                # Try different method signatures
-                try:
-                    # Try with memory_id as keyword argument: delete_memory(memory_id=...)
-                    loop.run_until_complete(self.sdk_client.delete_memory(memory_id=note_id))
-                except TypeError:
-                    # If that fails, try with assistant_id and memory_id (matching get_memories pattern)
-                    assistant_id = self._get_or_create_default_assistant()
-                    try:
-                        # Try positional: delete_memory(assistant_id, memory_id)
-                        loop.run_until_complete(self.sdk_client.delete_memory(assistant_id, note_id))
-                    except TypeError:
-                        # Try keyword: delete_memory(assistant_id=..., memory_id=...)
-                        loop.run_until_complete(self.sdk_client.delete_memory(assistant_id=assistant_id, memory_id=note_id))
-            elif hasattr(self.sdk_client, 'delete_note'):
+                # delete_memory(memory_id=...), or with the assistant: (assistant_id, memory_id)
+                self._call_sdk('delete_memory', _DELETE_MEMORY_SHAPES,
+                               memory_id=note_id, assistant_id=self._get_or_create_default_assistant)
+            elif 'delete_note' in self._sdk_methods:
                 self.sdk_client.delete_note(note_id)
-            elif hasattr(self.sdk_client, 'notes') and hasattr(self.sdk_client.notes, 'delete'):
+            elif 'notes.delete' in self._sdk_methods:
                 self.sdk_client.notes.delete(note_id)
-            elif hasattr(self.sdk_client, 'memory') and hasattr(self.sdk_client.memory, 'delete'):
+            elif 'memory.delete' in self._sdk_methods:
                 self.sdk_client.memory.delete(note_id)
             else:
                 return False
+            # Memory ids don't map back to note ids, so forget every recorded sync
+            with _synced_content_lock:
+                _synced_content.clear()
             return True
         except Exception as e:
             # Re-raise the exception so the API can return the actual error message
             raise RuntimeError(f"Failed to delete note: {str(e)}")
     
+    def delete_notes(self, note_ids: List[str]) -> list:
+        """Delete several notes concurrently
+        
+        Returns one entry per note_id, in order: True when deleted, False when the
+        SDK has no delete method, or the RuntimeError that failed that note.
+        """
+        shape = None
+        if 'delete_memory' in self._sdk_methods:
+            shape = self._sdk_call_shape('delete_memory', _DELETE_MEMORY_SHAPES)
+        if shape is None:
+            # No known call shape to batch with; delete one at a time
+            results = []
+            for note_id in note_ids:
+                try:
+                    results.append(self.delete_note(note_id))
+                except RuntimeError as e:
+                    results.append(e)
+            return results
+        
+        values = {}
+        if "assistant_id" in shape[0] + shape[1]:
+            values["assistant_id"] = self._get_or_create_default_assistant()
+        pending = [_shaped_call(self.sdk_client.delete_memory, *shape, {**values, "memory_id": note_id}) for note_id in note_ids]
+        outcomes = run_all(pending, return_exceptions=True)
+        
+        # Memory ids don't map back to note ids, so forget every recorded sync
+        with _synced_content_lock:
+            _synced_content.clear()
+        return [RuntimeError(f"Failed to delete note: {str(outcome)}") if isinstance(outcome, Exception) else True
+                for outcome in outcomes]
+    
     def delete_thread(self, thread_id: str) -> bool:
         """Delete a thread"""
         try:
-            # SDK methods are async, so we need to use asyncio to run them
-            import asyncio
-            try:
-                loop = asyncio.get_event_loop()
-                if loop.is_closed():
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-            except RuntimeError:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
             
             # Try different SDK method patterns for deleting threads
-            if hasattr(self.sdk_client, 'delete_thread'):
-                try:
-                    # Try: delete_thread(thread_id=thread_id)
-                    loop.run_until_complete(self.sdk_client.delete_thread(thread_id=thread_id))
-                except TypeError:
-                    try:
-                        # Try: delete_thread(thread_id)
-                        loop.run_until_complete(self.sdk_client.delete_thread(thread_id))
-                    except Exception as e:
-                        raise RuntimeError(f"Failed to delete thread: {str(e)}")
-            elif hasattr(self.sdk_client, 'threads') and hasattr(self.sdk_client.threads, 'delete'):
-                try:
-                    # Try: threads.delete(thread_id=thread_id)
-                    loop.run_until_complete(self.sdk_client.threads.delete(thread_id=thread_id))
-                except TypeError:
-                    try:
-                        # Try: threads.delete(thread_id)
-                        loop.run_until_complete(self.sdk_client.threads.delete(thread_id))
-                    except Exception as e:
-                        raise RuntimeError(f"Failed to delete thread: {str(e)}")
+            if 'delete_thread' in self._sdk_methods:
+                self._call_sdk('delete_thread', _THREAD_ID_SHAPES, thread_id=thread_id)
+            elif 'threads.delete' in self._sdk_methods:
+                self._call_sdk('threads.delete', _THREAD_ID_SHAPES, thread_id=thread_id)
             else:
                 return False
+            with _thread_previews_lock:
+                _thread_previews.pop(thread_id, None)
             return True
         except Exception as e:
             # Re-raise the exception so the API can return the actual error message
             raise RuntimeError(f"Failed to delete thread: {str(e)}")
     
+    def delete_threads(self, thread_ids: List[str], max_concurrency: int = 16) -> list:
+        """Delete several threads concurrently on this client
+        
+        Returns one entry per thread_id, in order: True when deleted, False when
+        the SDK has no delete method, or the RuntimeError that failed that thread.
+        """
+        name = next((n for n in ('delete_thread', 'threads.delete') if n in self._sdk_methods), None)
+        shape = self._sdk_call_shape(name, _THREAD_ID_SHAPES) if name else None
+        if shape is None:
+            # No known call shape to batch with; delete one at a time
+            results = []
+            for thread_id in thread_ids:
+                try:
+                    results.append(self.delete_thread(thread_id))
+                except RuntimeError as e:
+                    results.append(e)
+            return results
+        
+        method = _sdk_attr(self.sdk_client, name)
+        pending = [_shaped_call(method, *shape, {"thread_id": thread_id}) for thread_id in thread_ids]
+        outcomes = run_coro(_gather_limited(pending, max_concurrency))
+        
+        results = []
+        with _thread_previews_lock:
+            for thread_id, outcome in zip(thread_ids, outcomes):
+                if isinstance(outcome, Exception):
+                    results.append(RuntimeError(f"Failed to delete thread: {str(outcome)}"))
+                else:
+                    _thread_previews.pop(thread_id, None)
+                    results.append(True)
+        return results
+    
     def _get_or_create_thread(self, assistant_id: str) -> str:
         """Get or create a thread for the assistant"""
         # Return cached thread_id if available
         if self._default_thread_id:
             return self._default_thread_id
         
-        # SDK methods are async, so we need to use asyncio to run them
-        import asyncio
-        try:
-            loop = asyncio.get_event_loop()
-            if loop.is_closed():
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
         
         # Create a new thread for the assistant
-        if hasattr(self.sdk_client, 'create_thread'):
-            try:
-                # Try: create_thread(assistant_id)
-                thread = loop.run_until_complete(self.sdk_client.create_thread(assistant_id))
-            except TypeError:
-                # Try: create_thread(assistant_id=assistant_id)
-                thread = loop.run_until_complete(self.sdk_client.create_thread(assistant_id=assistant_id))
+        if 'create_thread' in self._sdk_methods:
+            thread = self._call_sdk('create_thread', _CREATE_THREAD_SHAPES, assistant_id=assistant_id)
             
             # Extract thread_id from the result
             if isinstance(thread, dict):
@@ -545,35 +982,42 @@ class BackboardClient:
     
     def get_memory_count(self, assistant_id: str) -> int:
         """Get the number of memories for a specific assistant"""
+        return run_coro(self.get_memory_count_async(assistant_id))
+    
+    async def get_memory_count_async(self, assistant_id: str) -> int:
+        """Get the number of memories for a specific assistant (awaitable, for batching)"""
         try:
-            if hasattr(self.sdk_client, 'get_memories'):
-                import asyncio
+            # Prefer the stats endpoint, which returns a count without the memories
+            if 'get_memory_stats' in self._sdk_methods:
+                stats = await self.sdk_client.get_memory_stats(assistant_id)
+                total = getattr(stats, 'total_memories', None)
+                if isinstance(total, int):
+                    return total
+            
+            if 'get_memories' in self._sdk_methods:
                 try:
-                    loop = asyncio.get_event_loop()
-                    if loop.is_closed():
-                        loop = asyncio.new_event_loop()
-                        asyncio.set_event_loop(loop)
-                except RuntimeError:
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                
-                results = loop.run_until_complete(self.sdk_client.get_memories(assistant_id))
-                
-                # Extract the actual list of memories
-                if hasattr(results, 'memories'):
-                    results = results.memories
-                elif hasattr(results, 'data'):
-                    results = results.data
-                elif hasattr(results, 'items'):
-                    results = results.items
-                elif isinstance(results, tuple) and len(results) > 0:
-                    results = results[0]
-                
-                if isinstance(results, list):
-                    return len(results)
-                return 0
+                    # One-item page; the response still carries total_count
+                    results = await self.sdk_client.get_memories(assistant_id, page=1, page_size=1)
+                except TypeError:
+                    results = await self.sdk_client.get_memories(assistant_id)
+                return self._count_memories(results)
         except Exception as e:
-            return 0
+            # One assistant's count failing shouldn't fail the whole assistant list
+            logger.warning("Failed to count memories for assistant %s: %s", assistant_id, e)
+        return 0
+    
+    def _count_memories(self, results) -> int:
+        """Count the memories in a get_memories response"""
+        total = getattr(results, 'total_count', None)
+        if isinstance(total, int):
+            return total
+        
+        # Extract the actual list of memories
+        results = _unwrap_list(results)
+        
+        if isinstance(results, list):
+            return len(results)
+        return 0
     
     def list_threads(self, assistant_id: Optional[str] = None, search: Optional[str] = None) -> List[dict]:
         """List all threads for an assistant
@@ -596,130 +1040,53 @@ class BackboardClient:
                 # Assistant not owned by this app, return empty list
                 return []
             
-            # SDK methods are async, so we need to use asyncio to run them
-            import asyncio
-            try:
-                loop = asyncio.get_event_loop()
-                if loop.is_closed():
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-            except RuntimeError:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
             
             threads = []
             
             # Try different SDK method patterns for listing threads
             # Always use keyword arguments to avoid parameter confusion (e.g., skip vs assistant_id)
-            if hasattr(self.sdk_client, 'list_threads'):
-                try:
-                    # Try: list_threads(assistant_id=assistant_id) - keyword argument only
-                    if assistant_id:
-                        results = loop.run_until_complete(self.sdk_client.list_threads(assistant_id=assistant_id))
-                    else:
-                        results = loop.run_until_complete(self.sdk_client.list_threads())
-                except (TypeError, ValueError) as e:
-                    # If keyword argument fails, try without assistant_id filter
-                    try:
-                        results = loop.run_until_complete(self.sdk_client.list_threads())
-                    except Exception:
-                        import logging
-                        logging.error(f"Failed to call list_threads: {str(e)}")
-                        raise
-            elif hasattr(self.sdk_client, 'threads') and hasattr(self.sdk_client.threads, 'list'):
-                try:
-                    # Try: threads.list(assistant_id=assistant_id) - keyword argument only
-                    if assistant_id:
-                        results = loop.run_until_complete(self.sdk_client.threads.list(assistant_id=assistant_id))
-                    else:
-                        results = loop.run_until_complete(self.sdk_client.threads.list())
-                except (TypeError, ValueError) as e:
-                    # If keyword argument fails, try without assistant_id filter
-                    try:
-                        results = loop.run_until_complete(self.sdk_client.threads.list())
-                    except Exception:
-                        import logging
-                        logging.error(f"Failed to call threads.list: {str(e)}")
-                        raise
+            # Filter by assistant_id when the method takes it (the SDK's list_threads doesn't)
+            shapes = _LIST_THREADS_SHAPES if assistant_id else _LIST_THREADS_SHAPES[1:]
+            if 'list_threads' in self._sdk_methods:
+                results = self._call_sdk('list_threads', shapes, assistant_id=assistant_id)
+            elif 'threads.list' in self._sdk_methods:
+                results = self._call_sdk('threads.list', shapes, assistant_id=assistant_id)
             else:
-                import logging
-                logging.warning("SDK client doesn't have list_threads or threads.list methods")
+                logger.warning("SDK client doesn't have list_threads or threads.list methods")
                 return []
             
             # Extract the actual list of threads
-            if hasattr(results, 'threads'):
-                results = results.threads
-            elif hasattr(results, 'data'):
-                results = results.data
-            elif hasattr(results, 'items'):
-                results = results.items
-            elif isinstance(results, tuple) and len(results) > 0:
-                results = results[0]
+            results = _unwrap_list(results, ("threads", "data", "items"))
             
             # Convert threads to list of dicts
-            import logging
             if isinstance(results, list):
+                pick = _pick
                 for thread in results:
                     if isinstance(thread, dict):
                         thread_dict = thread
                     elif hasattr(thread, '__dict__'):
-                        thread_dict = thread.__dict__.copy()
-                        # Also check direct attributes
-                        for attr in ['preview', 'preview_text', 'first_message', 'last_message', 'messages']:
-                            if hasattr(thread, attr):
-                                thread_dict[attr] = getattr(thread, attr)
+                        # Read-only view of the SDK object's fields; don't mutate it
+                        thread_dict = thread.__dict__
                     else:
                         continue
                     
-                    thread_id = thread_dict.get('thread_id') or thread_dict.get('id', '')
-                    created_at = thread_dict.get('created_at') or thread_dict.get('created_at', '')
-                    updated_at = thread_dict.get('updated_at') or thread_dict.get('updated_at', '')
+                    thread_id = pick(thread_dict, 'thread_id', 'id')
+                    # Falsy values pass through as-is; '' only when the field is missing
+                    created_at = thread_dict.get('created_at', '')
+                    updated_at = thread_dict.get('updated_at', '')
                     
                     # Try to get preview text from thread object if available
-                    preview_text = None
-                    # Check various possible fields for preview/message content
-                    if 'preview' in thread_dict and thread_dict.get('preview'):
-                        preview_text = str(thread_dict.get('preview'))
-                    elif 'preview_text' in thread_dict and thread_dict.get('preview_text'):
-                        preview_text = str(thread_dict.get('preview_text'))
-                    elif 'first_message' in thread_dict:
-                        first_msg = thread_dict.get('first_message')
-                        if isinstance(first_msg, dict):
-                            preview_text = first_msg.get('content') or first_msg.get('text') or first_msg.get('message') or first_msg.get('body', '')
-                        elif isinstance(first_msg, str):
-                            preview_text = first_msg
-                    elif 'last_message' in thread_dict:
-                        last_msg = thread_dict.get('last_message')
-                        if isinstance(last_msg, dict):
-                            preview_text = last_msg.get('content') or last_msg.get('text') or last_msg.get('message') or last_msg.get('body', '')
-                        elif isinstance(last_msg, str):
-                            preview_text = last_msg
-                    elif 'messages' in thread_dict and isinstance(thread_dict.get('messages'), list):
-                        # Check if messages array is in thread object
-                        messages = thread_dict.get('messages')
-                        for msg in messages:
-                            if isinstance(msg, dict):
-                                role = msg.get('role', '').lower()
-                                if role == 'user':
-                                    preview_text = msg.get('content') or msg.get('text') or msg.get('message') or msg.get('body', '')
-                                    break
-                            elif hasattr(msg, 'role') and (hasattr(msg, 'content') or hasattr(msg, 'text')):
-                                if getattr(msg, 'role', '').lower() == 'user':
-                                    preview_text = getattr(msg, 'content', '') or getattr(msg, 'text', '') or getattr(msg, 'message', '')
-                                    break
+                    preview_text = _extract_preview(thread_dict, thread)
                     
                     # Truncate preview if found
                     if preview_text:
-                        preview_text = str(preview_text).strip()
+                        # The tagging prompt is shorter than the cut, so it survives truncation
+                        preview_text = _preview_text(preview_text)
                         
                         # Exclude tagging request threads - they start with a specific prompt
-                        tagging_prompt_start = "Analyze this note and suggest 3-5 relevant category tags"
-                        if preview_text.startswith(tagging_prompt_start):
+                        if preview_text.startswith(_TAGGING_PROMPT_START):
                             # Skip this thread - it's a tagging request
                             continue
-                        
-                        if len(preview_text) > 100:
-                            preview_text = preview_text[:100] + '...'
                     
                     threads.append({
                         'thread_id': str(thread_id),
@@ -728,239 +1095,170 @@ class BackboardClient:
                         'preview_text': preview_text
                     })
             
+            # Search filter (matches thread_id or preview text), step 1: threads that already have
+            # a preview are decided now, so previews are only fetched for survivors. Threads
+            # without a preview are exempt until step 2, after the preview fetch
+            if search:
+                search_lower = search.lower()
+                
+                def matches_search(t):
+                    # One lowercased blob per thread; the newline keeps a match from spanning both fields
+                    return search_lower in f"{t.get('thread_id', '')}\n{t.get('preview_text') or ''}".lower()
+                
+                threads = [t for t in threads if not t.get('preview_text') or matches_search(t)]
+            
             # Fetch first message for each thread if preview_text is not available
             # Only fetch for threads without preview_text to avoid unnecessary API calls
-            import logging
-            threads_to_remove = []
-            for thread in threads:
-                if not thread.get('preview_text'):
-                    try:
-                        preview = self._get_thread_preview(thread['thread_id'], loop)
-                        if preview:
-                            preview_text = str(preview).strip()
-                            # Exclude tagging request threads
-                            tagging_prompt_start = "Analyze this note and suggest 3-5 relevant category tags"
-                            if preview_text.startswith(tagging_prompt_start):
-                                # Mark this thread for removal - it's a tagging request
-                                threads_to_remove.append(thread)
-                                continue
-                            thread['preview_text'] = preview_text
-                        else:
-                            logging.debug(f"No preview found for thread {thread['thread_id']}")
-                    except Exception as e:
-                        logging.debug(f"Could not fetch preview for thread {thread['thread_id']}: {str(e)}")
-                        # Continue without preview if fetch fails
-                        pass
+            removed = set()
+            # Without a way to read messages, every fetch would come back empty
+            missing = [thread for thread in threads if not thread.get('preview_text')] if self._can_fetch_messages() else []
+            previews = run_coro(self._get_thread_previews([thread['thread_id'] for thread in missing])) if missing else []
+            for thread, preview in zip(missing, previews):
+                if isinstance(preview, Exception):
+                    logger.debug("Could not fetch preview for thread %s: %s", thread['thread_id'], preview)
+                    # Continue without preview if fetch fails
+                elif preview:
+                    # Already normalized by _get_thread_preview_async
+                    preview_text = preview
+                    # Exclude tagging request threads
+                    if preview_text.startswith(_TAGGING_PROMPT_START):
+                        # Mark this thread for removal - it's a tagging request
+                        removed.add(id(thread))
+                        continue
+                    thread['preview_text'] = preview_text
+                else:
+                    logger.debug("No preview found for thread %s", thread['thread_id'])
             
             # Remove tagging request threads
-            threads = [t for t in threads if t not in threads_to_remove]
+            if removed:
+                threads = [t for t in threads if id(t) not in removed]
             
-            # Apply search filter if provided (currently filters by thread_id, can be extended for content search)
+            # Search filter, step 2: always runs when searching, since step 1 let every
+            # preview-less thread through whether or not a preview was fetched for it
             if search:
-                search_lower = search.lower()
-                threads = [t for t in threads if search_lower in t.get('thread_id', '').lower() or search_lower in (t.get('preview_text') or '').lower()]
+                threads = [t for t in threads if matches_search(t)]
             
             return threads
         except Exception as e:
-            import logging
-            logging.error(f"Error listing threads: {str(e)}", exc_info=True)
+            logger.error("Error listing threads: %s", e, exc_info=True)
             raise  # Re-raise to let API handle it properly
     
-    def _get_thread_preview(self, thread_id: str, loop) -> Optional[str]:
-        """Get the first user message from a thread as preview text"""
-        import logging
+    async def _get_thread_previews(self, thread_ids: List[str], max_concurrency: int = 16) -> list:
+        """Fetch previews concurrently; each entry is a preview, None, or the exception raised"""
+        limit = asyncio.Semaphore(max_concurrency)
+        
+        async def fetch(thread_id):
+            async with limit:
+                return await self._get_thread_preview_async(thread_id)
+        
+        return await asyncio.gather(*(fetch(thread_id) for thread_id in thread_ids), return_exceptions=True)
+    
+    async def _get_thread_preview_async(self, thread_id: str) -> Optional[str]:
+        """Get the first user message from a thread as preview text (awaitable, for batching)"""
+        with _thread_previews_lock:
+            cached = _thread_previews.get(thread_id)
+        if cached is not None:
+            return cached
         try:
-            # Try to get messages from the thread using various SDK method patterns
-            messages = None
-            
-            # Pattern 1: get_thread_messages
-            if hasattr(self.sdk_client, 'get_thread_messages'):
-                try:
-                    messages = loop.run_until_complete(self.sdk_client.get_thread_messages(thread_id=thread_id))
-                except (TypeError, AttributeError):
-                    try:
-                        messages = loop.run_until_complete(self.sdk_client.get_thread_messages(thread_id))
-                    except Exception as e:
-                        logging.debug(f"get_thread_messages failed: {e}")
-            
-            # Pattern 2: threads.get_messages
-            if messages is None and hasattr(self.sdk_client, 'threads') and hasattr(self.sdk_client.threads, 'get_messages'):
-                try:
-                    messages = loop.run_until_complete(self.sdk_client.threads.get_messages(thread_id=thread_id))
-                except (TypeError, AttributeError):
-                    try:
-                        messages = loop.run_until_complete(self.sdk_client.threads.get_messages(thread_id))
-                    except Exception as e:
-                        logging.debug(f"threads.get_messages failed: {e}")
-            
-            # Pattern 3: list_messages
-            if messages is None and hasattr(self.sdk_client, 'list_messages'):
-                try:
-                    messages = loop.run_until_complete(self.sdk_client.list_messages(thread_id=thread_id))
-                except (TypeError, AttributeError):
-                    try:
-                        messages = loop.run_until_complete(self.sdk_client.list_messages(thread_id))
-                    except Exception as e:
-                        logging.debug(f"list_messages failed: {e}")
-            
-            # Pattern 4: get_thread (might return thread with messages)
-            if messages is None and hasattr(self.sdk_client, 'get_thread'):
-                try:
-                    thread_obj = loop.run_until_complete(self.sdk_client.get_thread(thread_id=thread_id))
-                    if thread_obj:
-                        if isinstance(thread_obj, dict):
-                            messages = thread_obj.get('messages', [])
-                        elif hasattr(thread_obj, 'messages'):
-                            messages = thread_obj.messages
-                except (TypeError, AttributeError):
-                    try:
-                        thread_obj = loop.run_until_complete(self.sdk_client.get_thread(thread_id))
-                        if thread_obj:
-                            if isinstance(thread_obj, dict):
-                                messages = thread_obj.get('messages', [])
-                            elif hasattr(thread_obj, 'messages'):
-                                messages = thread_obj.messages
-                    except Exception as e:
-                        logging.debug(f"get_thread failed: {e}")
-            
+            messages = await self._fetch_thread_messages(thread_id)
             if messages is None:
                 return None
             
-            # Extract messages list if wrapped
-            if hasattr(messages, 'messages'):
-                messages = messages.messages
-            elif hasattr(messages, 'data'):
-                messages = messages.data
-            elif hasattr(messages, 'items'):
-                messages = messages.items
-            elif isinstance(messages, tuple) and len(messages) > 0:
-                messages = messages[0]
-            
             # Find first user message
+            messages = _unwrap_messages(messages)
             if isinstance(messages, list):
                 for msg in messages:
-                    if isinstance(msg, dict):
-                        msg_dict = msg
-                    elif hasattr(msg, '__dict__'):
-                        msg_dict = msg.__dict__
-                    else:
+                    role_content = _message_role_content(msg)
+                    if role_content is None:
                         continue
-                    
-                    role = msg_dict.get('role', '').lower()
-                    content = msg_dict.get('content', '') or msg_dict.get('text', '') or msg_dict.get('message', '') or msg_dict.get('body', '')
+                    role, content = role_content
                     
                     # Return first user message as preview
-                    if role == 'user' and content:
+                    if role == _USER_ROLE and content:
                         # Truncate to reasonable length
-                        preview = str(content).strip()
-                        if len(preview) > 100:
-                            preview = preview[:100] + '...'
+                        preview = _preview_text(content)
+                        # Only found previews are cached; an empty thread may still get its first message
+                        with _thread_previews_lock:
+                            _thread_previews[thread_id] = preview
                         return preview
             
             return None
         except Exception as e:
-            import logging
-            logging.debug(f"Could not get preview for thread {thread_id}: {str(e)}")
+            logger.debug("Could not get preview for thread %s: %s", thread_id, e)
             return None
     
+    def _resolve_messages_fetcher(self):
+        """Build (once per client) a coroutine function returning a thread's raw messages
+        
+        Uses the first of _MESSAGE_SOURCES the SDK has; the fetcher returns None when
+        there is none or the call fails.
+        """
+        name = next((name for name in _MESSAGE_SOURCES if name in self._sdk_methods), None)
+        if name is None:
+            self._messages_fetcher = _fetch_no_messages
+            return _fetch_no_messages
+        
+        method = _sdk_attr(self.sdk_client, name)
+        shape = self._sdk_call_shape(name, _THREAD_ID_SHAPES)
+        
+        async def fetch(thread_id):
+            try:
+                if shape is not None:
+                    result = await _shaped_call(method, *shape, {"thread_id": thread_id})
+                else:
+                    # Signature unreadable: only a TypeError (keyword rejected) earns the positional retry
+                    try:
+                        result = await method(thread_id=thread_id)
+                    except TypeError:
+                        result = await method(thread_id)
+            except Exception as e:
+                logger.debug("%s failed: %s", name, e)
+                return None
+            
+            # get_thread returns the thread, which might carry its messages
+            if name == "get_thread":
+                if not result:
+                    return None
+                if isinstance(result, dict):
+                    return result.get('messages', [])
+                return getattr(result, 'messages', None)
+            return result
+        
+        self._messages_fetcher = fetch
+        return fetch
+    
+    def _can_fetch_messages(self) -> bool:
+        """Whether the SDK has any way to read a thread's messages"""
+        return (self._messages_fetcher or self._resolve_messages_fetcher()) is not _fetch_no_messages
+    
+    async def _fetch_thread_messages(self, thread_id: str):
+        """A thread's raw messages response, or None"""
+        fetcher = self._messages_fetcher or self._resolve_messages_fetcher()
+        return await fetcher(thread_id)
+    
     def get_thread_messages(self, thread_id: str) -> List[dict]:
         """Get all messages from a thread
         
         Returns:
             List of message dicts with 'role' and 'content' keys
         """
-        import logging
-        import asyncio
+        if not self._can_fetch_messages():
+            return []
         try:
-            # SDK methods are async, so we need to use asyncio to run them
-            try:
-                loop = asyncio.get_event_loop()
-                if loop.is_closed():
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-            except RuntimeError:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-            
-            # Try to get messages from the thread using various SDK method patterns
-            messages = None
-            
-            # Pattern 1: get_thread_messages
-            if hasattr(self.sdk_client, 'get_thread_messages'):
-                try:
-                    messages = loop.run_until_complete(self.sdk_client.get_thread_messages(thread_id=thread_id))
-                except (TypeError, AttributeError):
-                    try:
-                        messages = loop.run_until_complete(self.sdk_client.get_thread_messages(thread_id))
-                    except Exception as e:
-                        logging.debug(f"get_thread_messages failed: {e}")
-            
-            # Pattern 2: threads.get_messages
-            if messages is None and hasattr(self.sdk_client, 'threads') and hasattr(self.sdk_client.threads, 'get_messages'):
-                try:
-                    messages = loop.run_until_complete(self.sdk_client.threads.get_messages(thread_id=thread_id))
-                except (TypeError, AttributeError):
-                    try:
-                        messages = loop.run_until_complete(self.sdk_client.threads.get_messages(thread_id))
-                    except Exception as e:
-                        logging.debug(f"threads.get_messages failed: {e}")
-            
-            # Pattern 3: list_messages
-            if messages is None and hasattr(self.sdk_client, 'list_messages'):
-                try:
-                    messages = loop.run_until_complete(self.sdk_client.list_messages(thread_id=thread_id))
-                except (TypeError, AttributeError):
-                    try:
-                        messages = loop.run_until_complete(self.sdk_client.list_messages(thread_id))
-                    except Exception as e:
-                        logging.debug(f"list_messages failed: {e}")
-            
-            # Pattern 4: get_thread (might return thread with messages)
-            if messages is None and hasattr(self.sdk_client, 'get_thread'):
-                try:
-                    thread_obj = loop.run_until_complete(self.sdk_client.get_thread(thread_id=thread_id))
-                    if thread_obj:
-                        if isinstance(thread_obj, dict):
-                            messages = thread_obj.get('messages', [])
-                        elif hasattr(thread_obj, 'messages'):
-                            messages = thread_obj.messages
-                except (TypeError, AttributeError):
-                    try:
-                        thread_obj = loop.run_until_complete(self.sdk_client.get_thread(thread_id))
-                        if thread_obj:
-                            if isinstance(thread_obj, dict):
-                                messages = thread_obj.get('messages', [])
-                            elif hasattr(thread_obj, 'messages'):
-                                messages = thread_obj.messages
-                    except Exception as e:
-                        logging.debug(f"get_thread failed: {e}")
-            
+            # SDK methods are async, so they run on the shared background loop
+            messages = run_coro(self._fetch_thread_messages(thread_id))
             if messages is None:
                 return []
             
-            # Extract messages list if wrapped
-            if hasattr(messages, 'messages'):
-                messages = messages.messages
-            elif hasattr(messages, 'data'):
-                messages = messages.data
-            elif hasattr(messages, 'items'):
-                messages = messages.items
-            elif isinstance(messages, tuple) and len(messages) > 0:
-                messages = messages[0]
-            
             # Convert messages to list of dicts
             result = []
+            messages = _unwrap_messages(messages)
             if isinstance(messages, list):
                 for msg in messages:
-                    if isinstance(msg, dict):
-                        msg_dict = msg
-                    elif hasattr(msg, '__dict__'):
-                        msg_dict = msg.__dict__
-                    else:
+                    role_content = _message_role_content(msg)
+                    if role_content is None:
                         continue
-                    
-                    role = msg_dict.get('role', '').lower()
-                    content = msg_dict.get('content', '') or msg_dict.get('text', '') or msg_dict.get('message', '') or msg_dict.get('body', '')
+                    role, content = role_content
                     
                     if content:  # Only include messages with content
                         result.append({
@@ -970,8 +1268,7 @@ class BackboardClient:
             
             return result
         except Exception as e:
-            import logging
-            logging.error(f"Error getting thread messages: {str(e)}", exc_info=True)
+            logger.error("Error getting thread messages: %s", e, exc_info=True)
             raise RuntimeError(f"Failed to get thread messages: {str(e)}")
     
     def chat(self, message: str, context_notes: Optional[List[str]] = None, assistant_id: Optional[str] = None, thread_id: Optional[str] = None, categories: Optional[List[str]] = None) -> dict:
@@ -988,114 +1285,106 @@ class BackboardClient:
             dict with 'response' and 'thread_id' keys
         """
         try:
-            # Get assistant_id (use provided one or default)
-            if not assistant_id:
-                assistant_id = self._get_or_create_default_assistant()
-            
-            # Use provided thread_id or get/create a thread for this assistant
-            if thread_id:
-                # Use the provided thread_id
-                thread_id = str(thread_id)
-            else:
-                # Reset thread cache if assistant_id changed
-                if hasattr(self, '_current_assistant_id') and self._current_assistant_id != assistant_id:
-                    self._default_thread_id = None
-                self._current_assistant_id = assistant_id
-                thread_id = self._get_or_create_thread(assistant_id)
-            
-            # SDK methods are async, so we need to use asyncio to run them
-            import asyncio
-            try:
-                loop = asyncio.get_event_loop()
-                if loop.is_closed():
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-            except RuntimeError:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
+            thread_id, add_message_kwargs = self.prepare_chat(message, context_notes, assistant_id, thread_id, categories)
             
-            # If categories are specified, filter memories by getting notes with those categories
-            # and using their IDs as context_notes
-            if categories:
-                # Get all notes and filter by categories
-                all_notes = self.list_notes()
-                filtered_note_ids = []
-                for note in all_notes:
-                    if note.categories:
-                        # Check if note has ALL specified categories
-                        if all(cat in note.categories for cat in categories):
-                            filtered_note_ids.append(note.id)
-                
-                # Use filtered note IDs as context if we have any
-                if filtered_note_ids:
-                    # Merge with existing context_notes if provided
-                    if context_notes:
-                        context_notes = list(set(context_notes + filtered_note_ids))
-                    else:
-                        context_notes = filtered_note_ids
-            
-            # Prepare add_message parameters
-            # According to the quickstart: add_message(thread_id=..., content=..., memory="Auto", stream=True)
-            # memory="Auto" enables automatic memory retrieval and storage
-            add_message_kwargs = {
-                'thread_id': thread_id,
-                'content': message,
-                'memory': 'Auto',  # Enable memory - automatically searches and retrieves saved memories
-                'stream': True
+            # Run the async collection
+            response = run_coro(self._collect_chat(add_message_kwargs))
+            return {
+                'response': response if response else "No response received",
+                'thread_id': thread_id
             }
-            
-            # Add optional parameters if they exist
-            if context_notes:
-                add_message_kwargs['context_notes'] = context_notes
-            
-            # Call add_message and collect streaming response
-            if hasattr(self.sdk_client, 'add_message'):
-                # add_message returns an async generator, need to await it first
-                async def collect_response():
-                    content_parts = []
-                    # According to quickstart: async for chunk in await client.add_message(...)
-                    stream = await self.sdk_client.add_message(**add_message_kwargs)
-                    async for chunk in stream:
-                        if isinstance(chunk, dict):
-                            chunk_type = chunk.get('type')
-                            if chunk_type == 'content_streaming':
-                                content_parts.append(chunk.get('content', ''))
-                            elif chunk_type == 'memory_retrieved':
-                                # Memory is being retrieved - this is informational, we can ignore it
-                                # or log it for debugging: memories = chunk.get('memories', [])
-                                pass
-                            elif chunk_type == 'message_complete':
-                                break
-                        elif hasattr(chunk, 'type'):
-                            if chunk.type == 'content_streaming':
-                                content_parts.append(getattr(chunk, 'content', ''))
-                            elif chunk.type == 'memory_retrieved':
-                                # Memory is being retrieved - informational
-                                pass
-                            elif chunk.type == 'message_complete':
-                                break
-                        else:
-                            # If not a dict, try to extract content directly
-                            if hasattr(chunk, 'content'):
-                                content_parts.append(chunk.content)
-                            elif isinstance(chunk, str):
-                                content_parts.append(chunk)
-                    return ''.join(content_parts)
-                
-                # Run the async collection
-                response = loop.run_until_complete(collect_response())
-                return {
-                    'response': response if response else "No response received",
-                    'thread_id': thread_id
-                }
-            else:
-                raise RuntimeError("SDK client doesn't have add_message method")
-            
         except Exception as e:
             
             raise RuntimeError(f"Chat request failed: {str(e)}")
     
-    def sync_note(self, note: Note) -> Note:
+    def prepare_chat(self, message: str, context_notes: Optional[List[str]] = None, assistant_id: Optional[str] = None, thread_id: Optional[str] = None, categories: Optional[List[str]] = None) -> tuple:
+        """Resolve the assistant, thread and context for a chat message
+        
+        Returns:
+            (thread_id, add_message_kwargs) to pass to chat_stream
+        """
+        if 'add_message' not in self._sdk_methods:
+            raise RuntimeError("SDK client doesn't have add_message method")
+        
+        # Get assistant_id (use provided one or default)
+        if not assistant_id:
+            assistant_id = self._get_or_create_default_assistant()
+        
+        # Use provided thread_id or get/create a thread for this assistant
+        if thread_id:
+            # Use the provided thread_id
+            thread_id = str(thread_id)
+        else:
+            # Reset thread cache if assistant_id changed
+            if hasattr(self, '_current_assistant_id') and self._current_assistant_id != assistant_id:
+                self._default_thread_id = None
+            self._current_assistant_id = assistant_id
+            thread_id = self._get_or_create_thread(assistant_id)
+        
+        
+        # If categories are specified, filter memories by getting notes with those categories
+        # and using their IDs as context_notes
+        if categories:
+            # Get all notes and filter by categories (chat goes ahead unfiltered if that fails)
+            try:
+                all_notes = self.list_notes()
+            except RuntimeError as e:
+                logger.warning("Failed to list notes for the category filter: %s", e)
+                all_notes = []
+            filtered_note_ids = []
+            for note in all_notes:
+                if note.categories:
+                    # Check if note has ALL specified categories
+                    if all(cat in note.categories for cat in categories):
+                        filtered_note_ids.append(note.id)
+            
+            # Use filtered note IDs as context if we have any
+            if filtered_note_ids:
+                # Merge with existing context_notes if provided
+                if context_notes:
+                    context_notes = list(set(context_notes + filtered_note_ids))
+                else:
+                    context_notes = filtered_note_ids
+        
+        # Prepare add_message parameters
+        # According to the quickstart: add_message(thread_id=..., content=..., memory="Auto", stream=True)
+        # memory="Auto" enables automatic memory retrieval and storage
+        add_message_kwargs = {
+            'thread_id': thread_id,
+            'content': message,
+            'memory': 'Auto',  # Enable memory - automatically searches and retrieves saved memories
+            'stream': True
+        }
+        
+        # Add optional parameters if they exist
+        if context_notes:
+            add_message_kwargs['context_notes'] = context_notes
+        
+        return thread_id, add_message_kwargs
+    
+    async def chat_stream(self, add_message_kwargs: dict):
+        """Yield (chunk_type, text) for each chunk of the reply, as the SDK streams it
+        
+        text is '' for events that carry no reply text (e.g. memory_retrieved) and
+        chunk_type is None for untyped chunks; the stream ends at message_complete.
+        """
+        # According to quickstart: async for chunk in await client.add_message(...)
+        stream = await self.sdk_client.add_message(**add_message_kwargs)
+        # Resolve the extractor for the stream's chunk class once, not per chunk
+        chunk_class = extract = None
+        async for chunk in stream:
+            if type(chunk) is not chunk_class:
+                chunk_class, extract = type(chunk), _chunk_extractor(chunk)
+            chunk_type, text = extract(chunk)
+            if chunk_type == 'message_complete':
+                break
+            yield chunk_type, text
+    
+    async def _collect_chat(self, add_message_kwargs: dict) -> str:
+        """The whole reply text from chat_stream"""
+        return ''.join([text async for _, text in self.chat_stream(add_message_kwargs)])
+    
+    def sync_note(self, note: Union[Note, InternalNote]) -> Note:
         """Sync a note to Backboard.io (create or update)"""
         
         
@@ -1121,10 +1410,143 @@ class BackboardClient:
             
             return result
     
-    def _sdk_result_to_note(self, result) -> Note:
-        """Convert SDK result object to our Note model"""
+    def sync_notes(self, notes: List[Union[Note, InternalNote]], max_concurrency: int = 32) -> list:
+        """Sync several notes in one trip to the background loop
         
+        get_note can't match Apple Notes ids to memories, so every note takes the
+        update path; with add_memory, all of their memories are added from a single
+        gather. Returns one entry per note, in order: the synced Note, or the
+        exception that failed it.
+        """
+        if 'add_memory' not in self._sdk_methods:
+            # No awaitable path; sync one at a time
+            results = []
+            for note in notes:
+                try:
+                    results.append(self.sync_note(note))
+                except Exception as e:
+                    results.append(e)
+            return results
         
+        assistant_id = self._get_or_create_default_assistant()
+        
+        async def sync_all():
+            limit = asyncio.Semaphore(max_concurrency)
+            
+            async def sync_one(note):
+                async with limit:
+                    return await self._sync_note_async(note, assistant_id)
+            
+            return await asyncio.gather(*(sync_one(note) for note in notes), return_exceptions=True)
+        
+        return run_coro(sync_all())
+    
+    def iter_sync_notes(self, notes: List[Union[Note, InternalNote]], max_concurrency: int = 32) -> Iterator[tuple]:
+        """Like sync_notes, but yield (note, synced Note or exception) as each note finishes
+        
+        Results come in completion order, so callers can report progress while
+        the rest are still syncing. Closing the iterator early cancels the notes
+        that haven't finished.
+        """
+        if 'add_memory' not in self._sdk_methods:
+            for note in notes:
+                try:
+                    yield note, self.sync_note(note)
+                except Exception as e:
+                    yield note, e
+            return
+        
+        assistant_id = self._get_or_create_default_assistant()
+        
+        async def sync_each():
+            limit = asyncio.Semaphore(max_concurrency)
+            
+            async def sync_one(note):
+                async with limit:
+                    try:
+                        return note, await self._sync_note_async(note, assistant_id)
+                    except Exception as e:
+                        return note, e
+            
+            pending = [asyncio.ensure_future(sync_one(note)) for note in notes]
+            try:
+                for next_done in asyncio.as_completed(pending):
+                    yield await next_done
+            finally:
+                for task in pending:
+                    task.cancel()
+        
+        yield from iter_async(sync_each())
+    
+    async def _sync_note_async(self, note: Union[Note, InternalNote], assistant_id: str) -> Note:
+        """update path of sync_note for an already resolved assistant (awaitable, for batching)"""
+        data = {"title": note.title, "content": note.content}
+        if note.categories is not None:
+            data["categories"] = list(note.categories)
+        return await self._update_note_async(note.id, data, assistant_id)
+    
+    def _sdk_result_to_note_many(self, results) -> List[Note]:
+        """Convert a list of SDK results to Notes, skipping pydantic validation
+        
+        Dicts and objects with a __dict__ (the SDK's pydantic models) are read
+        as mappings; anything else goes through _sdk_result_to_note. Notes
+        with missing timestamps share the batch's single datetime.now().
+        """
+        notes = []
+        append = notes.append
+        # One fallback timestamp for the whole batch
+        now = datetime.now()
+        for result in results:
+            fields_source = _field_sources_by_type.get(type(result))
+            if fields_source is None:
+                if isinstance(result, dict):
+                    fields_source = _FIELDS_FROM_DICT
+                elif hasattr(result, '__dict__'):
+                    fields_source = _FIELDS_FROM_OBJECT
+                else:
+                    fields_source = _FIELDS_UNSUPPORTED
+                _field_sources_by_type[type(result)] = fields_source
+            
+            if fields_source is _FIELDS_UNSUPPORTED:
+                append(self._sdk_result_to_note(result))
+                continue
+            
+            data = result if fields_source is _FIELDS_FROM_DICT else result.__dict__
+            append(Note.model_construct(**self._note_fields(data.get, now)))
+        return notes
+    
+    def _note_fields(self, get, now: Optional[datetime] = None) -> dict:
+        """Note fields from an SDK memory, read through get(key) (dict.get or an attribute getter)
+        
+        Missing or unparseable timestamps become now (the current time if not given).
+        """
+        memory_id = get("memory_id") or get("id") or ""
+        content = get("content") or get("data") or ""
+        title = get("title") or ""
+        if not title and content:
+            # Title is the first line of content; the body is what follows it
+            title, content = _split_title_body(content)
+        
+        categories = []
+        metadata = get("metadata") or get("meta") or {}
+        if isinstance(metadata, dict):
+            categories = metadata.get("categories", [])
+        elif hasattr(metadata, 'categories'):
+            categories = metadata.categories
+        if not isinstance(categories, list):
+            categories = []
+        
+        return {
+            "id": str(memory_id),
+            "title": title or "Untitled",
+            "content": content,
+            "created_at": self._parse_datetime(get("created_at"), now),
+            "updated_at": self._parse_datetime(get("updated_at"), now),
+            "categories": categories,
+        }
+    
+    def _sdk_result_to_note(self, result) -> Note:
+        """Convert SDK result object to our Note model"""
         # Handle None case
         if result is None:
             return Note(
@@ -1136,141 +1558,18 @@ class BackboardClient:
                 categories=[]
             )
         
-        # Handle different SDK result formats
-        if isinstance(result, dict):
-            
-            # SDK Memory objects might have memory_id instead of id, and content instead of title/content
-            memory_id = result.get("memory_id") or result.get("id") or ""
-            # Extract title from content if it's in the first line
-            content = result.get("content", "") or result.get("data", "")
-            title = result.get("title", "")
-            if not title and content:
-                # Try to extract title from first line of content
-                lines = content.split("\n")
-                first_line = lines[0].strip()
-                title = first_line[:100] if first_line else "Untitled"
-                # Remove the extracted title from content if it matches the first line
-                # This prevents title duplication when title was combined with content during create/update
-                # Compare the first 100 chars of first_line with title (since title is truncated to 100)
-                if len(lines) > 1 and first_line[:100] == title:
-                    # Remove first line and any following empty lines
-                    remaining_lines = lines[1:]
-                    while remaining_lines and not remaining_lines[0].strip():
-                        remaining_lines = remaining_lines[1:]
-                    content = "\n".join(remaining_lines)
-                elif first_line[:100] == title:
-                    # Only title, no content
-                    content = ""
-            
-            # Extract categories from metadata
-            categories = []
-            metadata = result.get("metadata") or result.get("meta") or {}
-            if isinstance(metadata, dict):
-                categories = metadata.get("categories", [])
-            if not isinstance(categories, list):
-                categories = []
-            
-            return Note(
-                id=str(memory_id),
-                title=title or "Untitled",
-                content=content,
-                created_at=self._parse_datetime(result.get("created_at")),
-                updated_at=self._parse_datetime(result.get("updated_at")),
-                categories=categories
-            )
-        elif hasattr(result, '__dict__'):
-            # Object with attributes
-            result_dict = result.__dict__
-            
-            memory_id = getattr(result, 'memory_id', None) or getattr(result, 'id', '')
-            content = getattr(result, 'content', '') or getattr(result, 'data', '')
-            title = getattr(result, 'title', '')
-            if not title and content:
-                # Try to extract title from first line of content
-                lines = content.split("\n")
-                first_line = lines[0].strip()
-                title = first_line[:100] if first_line else "Untitled"
-                # Remove the extracted title from content if it matches the first line
-                # This prevents title duplication when title was combined with content during create/update
-                # Compare the first 100 chars of first_line with title (since title is truncated to 100)
-                if len(lines) > 1 and first_line[:100] == title:
-                    # Remove first line and any following empty lines
-                    remaining_lines = lines[1:]
-                    while remaining_lines and not remaining_lines[0].strip():
-                        remaining_lines = remaining_lines[1:]
-                    content = "\n".join(remaining_lines)
-                elif first_line[:100] == title:
-                    # Only title, no content
-                    content = ""
-            
-            # Extract categories from metadata
-            categories = []
-            metadata = getattr(result, 'metadata', None) or getattr(result, 'meta', None) or {}
-            if isinstance(metadata, dict):
-                categories = metadata.get("categories", [])
-            elif hasattr(metadata, 'categories'):
-                categories = metadata.categories
-            if not isinstance(categories, list):
-                categories = []
-            
-            return Note(
-                id=str(memory_id),
-                title=title or "Untitled",
-                content=content,
-                created_at=self._parse_datetime(getattr(result, 'created_at', None)),
-                updated_at=self._parse_datetime(getattr(result, 'updated_at', None)),
-                categories=categories
-            )
+        # Dicts (and dict-likes) are read by key, anything else by attribute
+        if isinstance(result, dict) or (not hasattr(result, '__dict__') and hasattr(result, 'get')):
+            get = result.get
         else:
-            # Fallback - try to access as dict-like or convert to string
-            
-            memory_id = result.get("memory_id") if hasattr(result, 'get') else (getattr(result, 'memory_id', None) if hasattr(result, 'memory_id') else str(result))
-            content = result.get("content", "") if hasattr(result, 'get') else (getattr(result, 'content', '') if hasattr(result, 'content') else "")
-            title = result.get("title", "") if hasattr(result, 'get') else (getattr(result, 'title', '') if hasattr(result, 'title') else "")
-            if not title and content:
-                lines = content.split("\n")
-                first_line = lines[0].strip()
-                title = first_line[:100] if first_line else "Untitled"
-                # Remove the extracted title from content if it matches the first line
-                # This prevents title duplication when title was combined with content during create/update
-                # Compare the first 100 chars of first_line with title (since title is truncated to 100)
-                if len(lines) > 1 and first_line[:100] == title:
-                    # Remove first line and any following empty lines
-                    remaining_lines = lines[1:]
-                    while remaining_lines and not remaining_lines[0].strip():
-                        remaining_lines = remaining_lines[1:]
-                    content = "\n".join(remaining_lines)
-                elif first_line[:100] == title:
-                    # Only title, no content
-                    content = ""
-            
-            # Extract categories from metadata
-            categories = []
-            metadata = result.get("metadata") if hasattr(result, 'get') else (getattr(result, 'metadata', None) if hasattr(result, 'metadata') else None)
-            if not metadata:
-                metadata = result.get("meta") if hasattr(result, 'get') else (getattr(result, 'meta', None) if hasattr(result, 'meta') else {})
-            if isinstance(metadata, dict):
-                categories = metadata.get("categories", [])
-            elif hasattr(metadata, 'categories'):
-                categories = metadata.categories
-            if not isinstance(categories, list):
-                categories = []
-            
-            return Note(
-                id=str(memory_id),
-                title=title or "Untitled",
-                content=content,
-                created_at=self._parse_datetime(result.get("created_at") if hasattr(result, 'get') else (getattr(result, 'created_at', None) if hasattr(result, 'created_at') else None)),
-                updated_at=self._parse_datetime(result.get("updated_at") if hasattr(result, 'get') else (getattr(result, 'updated_at', None) if hasattr(result, 'updated_at') else None)),
-                categories=categories
-            )
+            def get(key):
+                return getattr(result, key, None)
+        return Note(**self._note_fields(get))
     
-    def _parse_datetime(self, dt_str: Optional[str]) -> datetime:
-        """Parse datetime string from API"""
-        if not dt_str:
-            return datetime.now()
-        
-        try:
-            return datetime.fromisoformat(dt_str.replace("Z", "+00:00"))
-        except:
-            return datetime.now()
+    def _parse_datetime(self, dt_str: Union[str, datetime, None], now: Optional[datetime] = None) -> datetime:
+        """Parse datetime string from API, falling back to now (the current time if not given)"""
+        # SDK models hand over datetimes already parsed
+        if isinstance(dt_str, datetime):
+            return dt_str
+        parsed = _parse_iso_datetime(dt_str) if dt_str and isinstance(dt_str, str) else None
+        return parsed or now or datetime.now()
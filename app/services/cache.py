@@ -1,11 +1,13 @@
-import json
 import hashlib
+import orjson
+from itertools import chain
+from operator import itemgetter
 from pathlib import Path
 from typing import List, Optional
 from datetime import datetime
 from pydantic import BaseModel
-from app.models.note import Note
-from app.config import BASE_DIR
+from app.models.note_internal import InternalNote
+from app.config import BASE_DIR, write_bytes_atomic
 
 
 class CacheMetadata(BaseModel):
@@ -15,6 +17,9 @@ class CacheMetadata(BaseModel):
     cached_at: datetime
     notes_hash: str
     last_modification: Optional[datetime] = None
+    # Cache file stat when it was written (recorded in the sidecar only)
+    file_mtime_ns: Optional[int] = None
+    file_size: Optional[int] = None
     
     class Config:
         json_encoders = {
@@ -23,12 +28,17 @@ class CacheMetadata(BaseModel):
 
 
 class NotesCache:
-    """Service to cache processed Apple Notes"""
+    """Service to cache processed Apple Notes
+    
+    The cache file is NDJSON: the metadata on the first line, then one note per line.
+    """
     
     def __init__(self, cache_file: Optional[Path] = None):
         if cache_file is None:
             cache_file = BASE_DIR / ".cache" / "notes_cache.json"
         self.cache_file = cache_file
+        # Metadata plus the cache file's stat, readable without loading the notes
+        self.meta_file = cache_file.with_name(f"{cache_file.stem}.meta.json")
         self.cache_file.parent.mkdir(parents=True, exist_ok=True)
     
     def _generate_cache_key(self, note_count: int, last_modification: Optional[datetime] = None) -> str:
@@ -40,90 +50,116 @@ class NotesCache:
         else:
             mod_time_str = 'none'
         key_data = f"{note_count}_{mod_time_str}"
-        return hashlib.md5(key_data.encode()).hexdigest()
+        return hashlib.blake2b(key_data.encode(), digest_size=16).hexdigest()
     
-    def _hash_notes(self, notes: List[Note]) -> str:
+    def _hash_notes(self, notes: List[InternalNote]) -> str:
         """Generate a hash of notes content for validation"""
-        # Create a stable representation of notes
-        notes_data = [
-            {
-                "id": note.id,
-                "title": note.title,
-                "updated_at": note.updated_at.isoformat()
-            }
-            for note in sorted(notes, key=lambda n: n.id)
-        ]
-        notes_json = json.dumps(notes_data, sort_keys=True)
-        return hashlib.md5(notes_json.encode()).hexdigest()
+        return self._hash_note_fields((note.id, note.title, note.updated_at.isoformat()) for note in notes)
     
-    def get_cached_notes_fast(self) -> Optional[List[Note]]:
-        """Get cached notes without requiring AppleScript calls - validates using cached metadata"""
-        if not self.cache_file.exists():
+    def _hash_note_fields(self, fields) -> str:
+        """Hash (id, title, updated_at ISO string) triples, in id order"""
+        # Stream a stable representation of notes (sorted by id) into the hash
+        digest = hashlib.blake2b(digest_size=16)
+        update = digest.update
+        for note_id, title, updated_at in sorted(fields, key=itemgetter(0)):
+            # Fields and notes are delimited by the ASCII unit/record separators
+            update(f"{note_id}\x1f{title}\x1f{updated_at}\x1e".encode())
+        return digest.hexdigest()
+    
+    def _fresh_sidecar(self) -> Optional[CacheMetadata]:
+        """Sidecar metadata, if it was written alongside the cache file as it is now"""
+        try:
+            stat = self.cache_file.stat()
+            sidecar = CacheMetadata.model_validate_json(self.meta_file.read_bytes())
+        except (OSError, ValueError):
             return None
+        if sidecar.file_mtime_ns != stat.st_mtime_ns or sidecar.file_size != stat.st_size:
+            return None
+        return sidecar
+    
+    def get_cached_notes_fast(self, verify: bool = False) -> Optional[List[InternalNote]]:
+        """Get cached notes without requiring AppleScript calls - validates using cached metadata
         
+        A cache file whose mtime and size still match the sidecar is trusted
+        without recomputing the notes hash, unless verify is set.
+        """
+        if not self.cache_file.exists():
+            return None
+        return self._load_notes(trusted=not verify and self._fresh_sidecar() is not None)
+    
+    def _load_notes(self, trusted: bool) -> Optional[List[InternalNote]]:
+        """Notes from the cache file (hash-checked unless trusted), or None"""
         try:
-            with open(self.cache_file, "r") as f:
-                cache_data = json.load(f)
-            
-            metadata_dict = cache_data.get("metadata", {})
-            # Parse datetime strings back to datetime objects
-            if "cached_at" in metadata_dict and isinstance(metadata_dict["cached_at"], str):
-                metadata_dict["cached_at"] = datetime.fromisoformat(metadata_dict["cached_at"])
-            if "last_modification" in metadata_dict and isinstance(metadata_dict["last_modification"], str):
-                metadata_dict["last_modification"] = datetime.fromisoformat(metadata_dict["last_modification"])
-            
-            metadata = CacheMetadata(**metadata_dict)
-            cached_notes = cache_data.get("notes", [])
-            
-            # Validate notes hash (this validates the actual notes content)
-            notes = []
-            for note_data in cached_notes:
-                # Parse datetime strings back to datetime objects
-                if "created_at" in note_data and isinstance(note_data["created_at"], str):
-                    note_data["created_at"] = datetime.fromisoformat(note_data["created_at"])
-                if "updated_at" in note_data and isinstance(note_data["updated_at"], str):
-                    note_data["updated_at"] = datetime.fromisoformat(note_data["updated_at"])
-                notes.append(Note(**note_data))
-            
-            current_hash = self._hash_notes(notes)
-            if metadata.notes_hash != current_hash:
-                return None
-            
-            # Cache is valid - return notes
-            return notes
+            with open(self.cache_file, "rb") as f:
+                return self._read_notes(f, trusted)
         except Exception as e:
             # If cache is corrupted, return None
             return None
     
-    def get_cached_notes(self, note_count: int, last_modification: Optional[datetime] = None) -> Optional[List[Note]]:
-        """Get cached notes if cache is valid (validates against current note_count and last_modification)"""
-        # First try fast validation
-        cached_notes = self.get_cached_notes_fast()
-        if cached_notes is None:
+    def _read_notes(self, f, trusted: bool) -> Optional[List[InternalNote]]:
+        """Notes from an open cache file, or None if they don't match the metadata's hash"""
+        # Pydantic parses the ISO date strings itself
+        metadata = CacheMetadata.model_validate_json(f.readline())
+        
+        # Validate notes hash (this validates the actual notes content)
+        notes = []
+        hash_fields = []
+        # Bulk-imported notes share timestamps, so each distinct string is parsed once
+        parsed_dates = {}
+        parse = datetime.fromisoformat
+        
+        def to_datetime(value):
+            if not isinstance(value, str):
+                return value
+            parsed = parsed_dates.get(value)
+            if parsed is None:
+                parsed = parsed_dates[value] = parse(value)
+            return parsed
+        
+        for line in f:
+            note_data = orjson.loads(line)
+            if not trusted:
+                # The stored updated_at is the isoformat() string _hash_notes would rebuild
+                hash_fields.append((note_data["id"], note_data["title"], note_data["updated_at"]))
+            # Parse datetime strings back to datetime objects
+            if "created_at" in note_data:
+                note_data["created_at"] = to_datetime(note_data["created_at"])
+            note_data["updated_at"] = to_datetime(note_data["updated_at"])
+            note_data["categories"] = tuple(note_data.get("categories") or ())
+            notes.append(InternalNote(**note_data))
+        
+        if not trusted and metadata.notes_hash != self._hash_note_fields(hash_fields):
             return None
         
-        # If fast validation passed, validate against current note_count and last_modification
+        # Cache is valid - return notes
+        return notes
+    
+    def get_cached_notes(self, note_count: int, last_modification: Optional[datetime] = None,
+                         verify: bool = False) -> Optional[List[InternalNote]]:
+        """Get cached notes if cache is valid (validates against current note_count and last_modification)"""
         # Normalize last_modification datetime to seconds precision for consistent key generation
         normalized_mod = last_modification.replace(microsecond=0) if last_modification else None
         expected_key = self._generate_cache_key(note_count, normalized_mod)
         
-        # Load metadata to check cache key (reuse from fast validation if possible, but reload for safety)
-        try:
-            with open(self.cache_file, "r") as f:
-                cache_data = json.load(f)
-            metadata_dict = cache_data.get("metadata", {})
-            if "last_modification" in metadata_dict and isinstance(metadata_dict["last_modification"], str):
-                metadata_dict["last_modification"] = datetime.fromisoformat(metadata_dict["last_modification"])
-            metadata = CacheMetadata(**metadata_dict)
-            
-            if metadata.cache_key != expected_key:
+        # A fresh sidecar answers the key check without reading the notes
+        sidecar = self._fresh_sidecar()
+        if sidecar is not None:
+            if sidecar.cache_key != expected_key:
                 return None
-            
-            return cached_notes
+            # Already checked fresh, so the cache file is read once and the sidecar not again
+            return self._load_notes(trusted=not verify)
+        
+        # Otherwise the key is on the cache file's first line, ahead of the notes
+        try:
+            with open(self.cache_file, "rb") as f:
+                if CacheMetadata.model_validate_json(f.readline()).cache_key != expected_key:
+                    return None
+                f.seek(0)
+                return self._read_notes(f, trusted=False)
         except Exception:
             return None
     
-    def cache_notes(self, notes: List[Note], note_count: int, last_modification: Optional[datetime] = None) -> None:
+    def cache_notes(self, notes: List[InternalNote], note_count: int, last_modification: Optional[datetime] = None) -> None:
         """Cache processed notes"""
         try:
             # Normalize last_modification datetime to seconds precision for consistent key generation
@@ -131,6 +167,11 @@ class NotesCache:
             cache_key = self._generate_cache_key(note_count, normalized_mod)
             notes_hash = self._hash_notes(notes)
             
+            # Same notes under the same key as the file on disk: leave it as it is
+            sidecar = self._fresh_sidecar()
+            if sidecar is not None and sidecar.cache_key == cache_key and sidecar.notes_hash == notes_hash:
+                return
+            
             metadata = CacheMetadata(
                 note_count=note_count,
                 cache_key=cache_key,
@@ -139,22 +180,31 @@ class NotesCache:
                 last_modification=normalized_mod
             )
             
-            cache_data = {
-                "metadata": metadata.model_dump(mode="json"),
-                "notes": [note.model_dump(mode="json") for note in notes]
-            }
+            # orjson encodes the InternalNote dataclasses directly; its datetime output
+            # matches isoformat(), which the fast path's hash check relies on
+            lines = chain(
+                (metadata.model_dump_json(exclude={"file_mtime_ns", "file_size"}).encode() + b"\n",),
+                (orjson.dumps(note, option=orjson.OPT_APPEND_NEWLINE) for note in notes),
+            )
+            
+            # Atomic replace, so a killed process or a concurrent reader never sees half a file
+            write_bytes_atomic(self.cache_file, lines)
             
-            with open(self.cache_file, "w") as f:
-                json.dump(cache_data, f, indent=2)
+            # Written after the cache file, so a sidecar whose stat doesn't match is never trusted
+            stat = self.cache_file.stat()
+            sidecar = metadata.model_copy(update={"file_mtime_ns": stat.st_mtime_ns, "file_size": stat.st_size})
+            write_bytes_atomic(self.meta_file, sidecar.model_dump_json().encode())
         except Exception:
             # Silently fail if caching fails
             pass
     
     def invalidate_cache(self) -> None:
         """Invalidate the cache by deleting the cache file"""
+        self.meta_file.unlink(missing_ok=True)
         if self.cache_file.exists():
             self.cache_file.unlink()
     
-    def is_cache_valid(self, note_count: int, last_modification: Optional[datetime] = None) -> bool:
-        """Check if cache exists and is valid"""
-        return self.get_cached_notes(note_count, last_modification) is not None
+    def is_cache_valid(self, note_count: int, last_modification: Optional[datetime] = None,
+                       verify: bool = False) -> bool:
+        """Check if cache exists and is valid (verify also rechecks the notes hash)"""
+        return self.get_cached_notes(note_count, last_modification, verify) is not None
@@ -1,7 +1,27 @@
+import hashlib
 import re
+import threading
+from bisect import bisect_right
+from itertools import accumulate
 from typing import List
+from cachetools import LRUCache
 from pydantic import BaseModel, Field
 
+# Paragraph breaks and sentence endings
+_PARAGRAPH_RE = re.compile(r'\n\s*\n')
+_SENTENCE_RE = re.compile(r'([.!?]+)\s+')
+
+
+def _utf8_len(text: str) -> int:
+    """Size of text in UTF-8 bytes (ASCII text, the common case, is measured without encoding)"""
+    return len(text) if text.isascii() else len(text.encode('utf-8'))
+
+
+# Chunks of notes too long for one chunk, per (text digest, title, max_chunk_size). The same
+# note is re-chunked on every sync of it, and splitting a long note is the chunker's slow path.
+_split_cache = LRUCache(maxsize=128)
+_split_cache_lock = threading.Lock()
+
 
 class Chunk(BaseModel):
     """Represents a single chunk of text"""
@@ -33,125 +53,130 @@ class SemanticChunker:
         Returns:
             List of Chunk objects
         """
+        # Whitespace-only text has no chunks, and the fast path below must not keep
+        # the surrounding whitespace the split path strips from each paragraph
+        text = text.strip() if text else ""
         if not text:
             return []
         
         # Calculate header overhead (title + part indicator)
         # Format: "{title}\n\n{content}\n\n[Part {n}/{total}]"
-        header_overhead = len(title.encode('utf-8')) + 50  # Approximate overhead for part indicator
-        
+        header_overhead = _utf8_len(title) + 50  # Approximate overhead for part indicator
+        limit = self.max_chunk_size - header_overhead
+        
+        # Most notes fit in one chunk: return the stripped text without splitting it up.
+        # A char is at most 4 UTF-8 bytes, so short text passes without being measured.
+        if len(text) * 4 <= limit or _utf8_len(text) <= limit:
+            content = f"{title}\n\n{text}" if title else text
+            return [Chunk(content=content, part_number=1, total_parts=1)]
+        
+        key = (hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest(), title, self.max_chunk_size)
+        with _split_cache_lock:
+            chunks = _split_cache.get(key)
+        if chunks is None:
+            chunks = tuple(self._split_text(text, title, limit))
+            with _split_cache_lock:
+                _split_cache[key] = chunks
+        # The Chunk objects are shared with the cache; callers only read them
+        return list(chunks)
+    
+    def _split_text(self, text: str, title: str, limit: int) -> List[Chunk]:
+        """Split text that doesn't fit one chunk of limit bytes (plus headers) into chunks"""
         # First, try splitting by paragraphs (double newlines)
         paragraphs = self._split_by_paragraphs(text)
         
+        # Parts of each chunk, joined into Chunks once the total is known
         chunks = []
         current_chunk_parts = []
         current_size = 0
         
-        for paragraph in paragraphs:
-            para_size = len(paragraph.encode('utf-8'))
-            
+        sizes = [_utf8_len(paragraph) for paragraph in paragraphs]
+        # offsets[k] is the combined size of the first k paragraphs
+        offsets = list(accumulate(sizes, initial=0))
+        
+        i = 0
+        while i < len(paragraphs):
             # If single paragraph exceeds limit, split by sentences
-            if para_size > (self.max_chunk_size - header_overhead):
+            if sizes[i] > limit:
+                paragraph = paragraphs[i]
+                i += 1
                 # Split this paragraph by sentences
                 sentences = self._split_by_sentences(paragraph)
                 
                 for sentence in sentences:
-                    sent_size = len(sentence.encode('utf-8'))
+                    sent_size = _utf8_len(sentence)
                     
                     # If even a sentence is too large, split by characters (fallback)
-                    if sent_size > (self.max_chunk_size - header_overhead):
+                    if sent_size > limit:
                         char_chunks = self._split_by_characters(
                             sentence, 
-                            self.max_chunk_size - header_overhead
+                            limit
                         )
                         for char_chunk in char_chunks:
-                            if current_size + len(char_chunk.encode('utf-8')) > (self.max_chunk_size - header_overhead):
-                                # Save current chunk (total_parts will be updated later)
+                            char_size = _utf8_len(char_chunk)
+                            if current_size + char_size > limit:
+                                # Save current chunk (it becomes a Chunk once total_parts is known)
                                 if current_chunk_parts:
-                                    chunks.append(self._create_chunk(current_chunk_parts, title, len(chunks) + 1, 0))
+                                    chunks.append(current_chunk_parts)
                                     current_chunk_parts = []
                                     current_size = 0
                             
                             current_chunk_parts.append(char_chunk)
-                            current_size += len(char_chunk.encode('utf-8'))
+                            current_size += char_size
                     else:
                         # Check if adding this sentence would exceed limit
-                        if current_size + sent_size > (self.max_chunk_size - header_overhead):
-                            # Save current chunk (total_parts will be updated later)
+                        if current_size + sent_size > limit:
+                            # Save current chunk (it becomes a Chunk once total_parts is known)
                             if current_chunk_parts:
-                                chunks.append(self._create_chunk(current_chunk_parts, title, len(chunks) + 1, 0))
+                                chunks.append(current_chunk_parts)
                                 current_chunk_parts = []
                                 current_size = 0
                         
                         current_chunk_parts.append(sentence)
                         current_size += sent_size
-            else:
-                # Check if adding this paragraph would exceed limit
-                if current_size + para_size > (self.max_chunk_size - header_overhead):
-                    # Save current chunk (total_parts will be updated later)
-                    if current_chunk_parts:
-                        chunks.append(self._create_chunk(current_chunk_parts, title, len(chunks) + 1, 0))
-                        current_chunk_parts = []
-                        current_size = 0
-                
-                current_chunk_parts.append(paragraph)
-                current_size += para_size
+                continue
+            
+            # Paragraphs i..end-1 are what still fits in the current chunk, found by bisecting the
+            # prefix sums rather than adding them up one at a time. A paragraph over the limit
+            # can't fit, so the run always stops before the next one that needs splitting.
+            end = bisect_right(offsets, offsets[i] + limit - current_size, i, len(paragraphs) + 1) - 1
+            if end > i:
+                current_chunk_parts.extend(paragraphs[i:end])
+                current_size += offsets[end] - offsets[i]
+                i = end
+            elif current_chunk_parts:
+                # Save current chunk (it becomes a Chunk once total_parts is known); paragraph i
+                # fits in an empty one
+                chunks.append(current_chunk_parts)
+                current_chunk_parts = []
+                current_size = 0
         
         # Add remaining chunk
         if current_chunk_parts:
-            chunks.append(self._create_chunk(current_chunk_parts, title, len(chunks) + 1, 0))
-        
-        # Update total_parts for all chunks
-        total_parts = len(chunks) if chunks else 1
-        
-        # If only one chunk, return it without part indicator
-        if total_parts == 1:
-            return chunks if chunks else [Chunk(content=text, part_number=1, total_parts=1)]
-        
-        # Recreate chunks with correct total_parts
-        final_chunks = []
-        for i, chunk in enumerate(chunks):
-            # Rebuild content with correct total_parts
-            content = chunk.content
-            # Remove old part indicator if present
-            content = re.sub(r'\n\n\[Part \d+/\d+\]$', '', content)
-            # Add correct part indicator
-            content += f"\n\n[Part {i + 1}/{total_parts}]"
-            final_chunks.append(Chunk(
-                content=content,
-                part_number=i + 1,
-                total_parts=total_parts
-            ))
-        
-        return final_chunks
+            chunks.append(current_chunk_parts)
+        
+        if not chunks:
+            return [Chunk(content=text, part_number=1, total_parts=1)]
+        
+        # The part count is known now, so each chunk's text is joined exactly once
+        total_parts = len(chunks)
+        return [self._create_chunk(parts, title, i + 1, total_parts) for i, parts in enumerate(chunks)]
     
     def _split_by_paragraphs(self, text: str) -> List[str]:
         """Split text by paragraphs (double newlines)"""
-        paragraphs = re.split(r'\n\s*\n', text)
+        paragraphs = _PARAGRAPH_RE.split(text)
         # Filter out empty paragraphs and preserve single newlines within paragraphs
-        return [p.strip() for p in paragraphs if p.strip()]
+        return [p for p in map(str.strip, paragraphs) if p]
     
     def _split_by_sentences(self, text: str) -> List[str]:
         """Split text by sentences (periods, exclamation marks, question marks)"""
-        # Pattern to match sentence endings followed by whitespace or end of string
-        pattern = r'([.!?]+)\s+'
-        sentences = re.split(pattern, text)
-        
-        # Recombine sentences with their punctuation
-        result = []
-        i = 0
-        while i < len(sentences):
-            if i + 1 < len(sentences):
-                # Combine sentence with its punctuation
-                combined = sentences[i] + sentences[i + 1]
-                result.append(combined.strip())
-                i += 2
-            else:
-                if sentences[i].strip():
-                    result.append(sentences[i].strip())
-                i += 1
+        # Split at sentence endings followed by whitespace, keeping the punctuation
+        pieces = _SENTENCE_RE.split(text)
         
-        return [s for s in result if s]
+        # split() alternates text and captured punctuation, ending with the text after the last match
+        sentences = [body + punctuation for body, punctuation in zip(pieces[0::2], pieces[1::2])]
+        sentences.append(pieces[-1])
+        return [s for s in map(str.strip, sentences) if s]
     
     def _split_by_characters(self, text: str, max_size: int) -> List[str]:
         """Fallback: split text by character count (preserves word boundaries when possible)"""
@@ -161,7 +186,7 @@ class SemanticChunker:
         current_size = 0
         
         for word in words:
-            word_size = len(word.encode('utf-8')) + 1  # +1 for space
+            word_size = _utf8_len(word) + 1  # +1 for space
             if current_size + word_size > max_size:
                 if current_chunk:
                     chunks.append(' '.join(current_chunk))
@@ -169,7 +194,7 @@ class SemanticChunker:
                     current_size = 0
                 
                 # If single word exceeds limit, split it
-                if len(word.encode('utf-8')) > max_size:
+                if word_size - 1 > max_size:
                     # Split word character by character
                     word_bytes = word.encode('utf-8')
                     for i in range(0, len(word_bytes), max_size):
@@ -187,11 +212,11 @@ class SemanticChunker:
         
         return chunks if chunks else [text]
     
-    def _create_chunk(self, parts: List[str], title: str, part_number: int, total_parts: int = 0) -> Chunk:
+    def _create_chunk(self, parts: List[str], title: str, part_number: int, total_parts: int) -> Chunk:
         """Create a Chunk object from text parts"""
         content = '\n\n'.join(parts)
         
-        # Add title and part indicator (total_parts will be updated after all chunks are created)
+        # Add title and part indicator
         if title:
             chunk_content = f"{title}\n\n{content}"
         else:
@@ -3,7 +3,46 @@
 from app import create_app
 import os
 
+HOST = "0.0.0.0"
+PORT = 9000
+
+
+def serve_production(app):
+    """Serve the app with gunicorn (threaded workers, forked after the app is loaded)"""
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        # gunicorn isn't available on Windows; fall back to Flask's threaded server
+        app.run(debug=False, host=HOST, port=PORT, threaded=True)
+        return
+
+    options = {
+        "bind": f"{HOST}:{PORT}",
+        # One worker: caches, the notes ETag version, sync dedup and single-flight fetches
+        # all live in process memory, so a second worker would serve stale state
+        "workers": 1,
+        # Threads rather than gevent: SDK calls run on the app's own asyncio loop thread,
+        # and streamed responses (chat, note import) each hold a thread while open
+        "worker_class": "gthread",
+        "threads": int(os.environ.get("GUNICORN_THREADS", 8)),
+        "preload_app": True,
+    }
+
+    class Server(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    Server().run()
+
+
 if __name__ == "__main__":
     config_name = os.environ.get("FLASK_ENV", "development")
     app = create_app(config_name)
-    app.run(debug=True, host="0.0.0.0", port=9000)
+    if config_name == "development":
+        app.run(debug=True, host=HOST, port=PORT)
+    else:
+        serve_production(app)